@@ -0,0 +1,160 @@
+"""
+Synthetic catalog and subtitle blobs served by the mock Looke API.
+
+The media dicts mirror the shape of real findmedia responses (FullTitle, ParentId, Childs,
+SerieInfo, Metadata, FileInfo, Smooth, Images and Price groups), so the client, CLI and
+converter paths see realistic payload sizes.
+"""
+import struct
+
+MOVIE_ID = 10
+SERIES_ID = 100
+
+def season_id(season: int) -> int:
+    return 10_000 + season
+
+def episode_id(season: int, episode: int) -> int:
+    return 1_000_000 + season * 1000 + episode
+
+def _cue_time(ms: int, separator: str = ".") -> str:
+    return "{:02d}:{:02d}:{:02d}{}{:03d}".format(ms // 3_600_000, ms // 60_000 % 60, ms // 1000 % 60, separator, ms % 1000)
+
+def _cues(count: int):
+    for index in range(count):
+        start = index * 2500
+        yield start, start + 2000, f"Line {index} of the benchmark subtitle\nwith a second row"
+
+def vtt(cues: int = 600) -> bytes:
+    lines = ["WEBVTT", ""]
+    for start, end, text in _cues(cues):
+        lines += [f"{_cue_time(start)} --> {_cue_time(end)}", text, ""]
+    return "\n".join(lines).encode("utf-8")
+
+def ttml(cues: int = 600) -> bytes:
+    body = "".join(
+        f'<p begin="{_cue_time(start)}" end="{_cue_time(end)}">{text.replace(chr(10), "<br/>")}</p>'
+        for start, end, text in _cues(cues)
+    )
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>'
+        '<tt xmlns="http://www.w3.org/ns/ttml" xml:lang="pt-BR"><body><div>'
+        f"{body}"
+        "</div></body></tt>"
+    ).encode("utf-8")
+
+def _box(box_type: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I", len(payload) + 8) + box_type + payload
+
+def ismt(cues: int = 600) -> bytes:
+    return (
+        _box(b"ftyp", b"isml\x00\x00\x00\x01piffiso2")
+        + _box(b"moov", _box(b"trak", _box(b"stsd", b"\x00" * 8 + _box(b"stpp", b"\x00" * 8))))
+        + _box(b"moof", _box(b"mfhd", b"\x00" * 8))
+        + _box(b"mdat", ttml(cues))
+    )
+
+def bilibili(cues: int = 600) -> bytes:
+    body = ",".join(
+        '{"from":%.3f,"to":%.3f,"location":2,"content":"%s"}' % (start / 1000, end / 1000, text.replace("\n", "\\n"))
+        for start, end, text in _cues(cues)
+    )
+    return (
+        '{"font_size":0.4,"font_color":"#FFFFFF","background_alpha":0.5,'
+        '"background_color":"#9C27B0","Stroke":"none","body":[' + body + "]}"
+    ).encode("utf-8")
+
+def error_page() -> bytes:
+    # What a CDN answers for a missing subtitle, which must be detected as unknown rather than break the sniffer.
+    return b'<?xml version="1.0" encoding="UTF-8"?><Error><Code>NoSuchKey</Code><Message>Not found</Message></Error>'
+
+SUBTITLES = {
+    "vtt": vtt,
+    "ttml": ttml,
+    "ismt": ismt
+}
+
+def _subtitles(base_url: str, media_id: int) -> list:
+    return [
+        {
+            "Code": code,
+            "Name": name,
+            "UrlVTT": f"{base_url}/subtitles/{media_id}-{code}.vtt",
+            "UrlTTM": f"{base_url}/subtitles/{media_id}-{code}.ttml",
+            "UrlSRT": ""
+        }
+        for code, name in (("pt-BR", "Português"), ("en", "English"), ("es", "Español"))
+    ]
+
+def _media(base_url: str, media_id: int, full_title: str, parent_id, position=None) -> dict:
+    return {
+        "Id": media_id,
+        "ParentId": parent_id,
+        "FullTitle": full_title,
+        "SerieInfo": {"EpisodeName": full_title, "Position": position, "SeasonName": None},
+        "Metadata": {
+            "Actors": "Actor One, Actor Two, Actor Three",
+            "AverageRating": 4.5,
+            "Censure": "14",
+            "Country": "Brasil",
+            "Description": "Benchmark media description. " * 8,
+            "Directors": "Director",
+            "Distributor": "Distributor",
+            "Genres": "Drama|Comédia",
+            "IsCinema": False,
+            "PreOrderDate": None,
+            "Synopsis": "Benchmark media synopsis. " * 8,
+            "TrailerUrl": "",
+            "UniqueUrl": f"https://www.looke.com.br/detalhes/{media_id}",
+            "Year": 2020
+        },
+        "FileInfo": {
+            "Audios": "pt-BR|en",
+            "CreditStartsAt": 3300,
+            "Definition": "HD",
+            "DubbedInfo": "Dublado e Legendado",
+            "Duration": 3600,
+            "Subtitles": _subtitles(base_url, media_id) if position or parent_id is None else []
+        },
+        "Smooth": {
+            "TimeFrameDistance": 10,
+            "TimeFrameUrl": f"{base_url}/thumbs/{media_id}",
+            "UrlDashStreaming": f"{base_url}/dash/{media_id}/manifest.mpd"
+        },
+        "Images": [
+            {"TypeId": type_id, "Url": f"{base_url}/images/{media_id}-{type_id}.jpg"}
+            for type_id in (4001, 9001, 9011)
+        ],
+        "Price": {"FreePrice": 0, "PreOrder": False, "PurchasePrice": 0, "RentPrice": 0, "SVODPrice": 0},
+        "Childs": []
+    }
+
+def catalog(base_url: str, seasons: int = 4, episodes: int = 10) -> dict:
+    """
+    Builds the media returned by findmedia, keyed by media ID: one movie and one series with
+    the given number of seasons and episodes per season.
+    """
+    medias = {
+        MOVIE_ID: _media(base_url, MOVIE_ID, "Benchmark Movie", None)
+    }
+
+    series = _media(base_url, SERIES_ID, "Benchmark Series", None)
+    series["FileInfo"]["Subtitles"] = []
+    medias[SERIES_ID] = series
+
+    for season in range(1, seasons + 1):
+        season_media = _media(base_url, season_id(season), f"Benchmark Series - {season}ª Temporada", SERIES_ID)
+        medias[season_id(season)] = season_media
+        series["Childs"].append({key: value for key, value in season_media.items() if key != "Childs"})
+
+        for episode in range(1, episodes + 1):
+            episode_media = _media(
+                base_url,
+                episode_id(season, episode),
+                f"Benchmark Series - {season}ª Temporada - Episódio {episode}",
+                season_id(season),
+                position=episode
+            )
+            medias[episode_id(season, episode)] = episode_media
+            season_media["Childs"].append({key: value for key, value in episode_media.items() if key != "Childs"})
+
+    return medias
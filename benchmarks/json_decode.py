@@ -0,0 +1,80 @@
+"""
+Micro-benchmark of the JSON decoders behind pylooke.utils.decoder.
+
+Decodes representative findmedia response bodies (a movie, a season page of episodes and a
+series with its seasons, with full Metadata and Images) with every installed backend, plus the
+previous path that decoded a findmedia body twice with the stdlib.
+
+Usage:
+    python benchmarks/json_decode.py [--iterations 2000] [--output json_decode.json]
+"""
+import argparse
+import json
+import sys
+import time
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import fixtures
+
+from pylooke.utils import decoder
+
+def payloads(seasons: int = 20, episodes: int = 50) -> dict:
+    catalog = fixtures.catalog("https://cdn.example.com", seasons=seasons, episodes=episodes)
+
+    def response(media: dict) -> bytes:
+        return json.dumps({"FindMediaResult": {"Movies": [media]}}).encode("utf-8")
+
+    return {
+        "movie": response(catalog[fixtures.MOVIE_ID]),
+        "season": response(catalog[fixtures.season_id(1)]),
+        "series": response(catalog[fixtures.SERIES_ID])
+    }
+
+def measure(loads, data: bytes, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        loads(data)
+    return (time.perf_counter() - start) / iterations
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    backends = {}
+    for name in decoder.BACKENDS:
+        try:
+            backends[name] = decoder._load_backend(name)
+        except ImportError:
+            print(f"{name:<14} not installed")
+    backends["json (twice)"] = lambda data: (json.loads(data), json.loads(data))
+
+    results = []
+    for payload, data in payloads().items():
+        for name, loads in backends.items():
+            seconds = measure(loads, data, max(args.iterations // max(len(data) // 10_000, 1), 10))
+            results.append({
+                "payload": payload,
+                "bytes": len(data),
+                "backend": name,
+                "us_per_decode": round(seconds * 1_000_000, 2),
+                "mb_per_s": round(len(data) / seconds / 1_000_000, 1)
+            })
+            print(
+                f"{payload:<7} {len(data):>9} B  {name:<14} {seconds * 1_000_000:>10.2f} us  "
+                f"{len(data) / seconds / 1_000_000:>8.1f} MB/s"
+            )
+
+    if args.output:
+        args.output.write_text(json.dumps({
+            "python": sys.version.split()[0],
+            "default_backend": decoder.backend(),
+            "results": results
+        }, indent=2))
+
+if __name__ == "__main__":
+    main()
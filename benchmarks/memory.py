@@ -0,0 +1,87 @@
+"""
+Memory benchmark of the media model.
+
+Decodes the same synthetic episodes from JSON into raw find_media dicts and into
+pylooke.utils.models.Media objects (with and without the lazy groups), and reports the
+memory retained per 100k episodes, measured with tracemalloc.
+
+Usage:
+    python benchmarks/memory.py [--episodes 100000] [--output memory.json]
+"""
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import fixtures
+
+from pylooke.utils.models import Media
+
+def payloads(count: int, episodes_per_season: int = 20) -> list:
+    """
+    Serialized episodes, so every decoded copy owns its strings like a real response would.
+    """
+    blobs = []
+    for index in range(count):
+        season, episode = divmod(index, episodes_per_season)
+        media = fixtures._media(
+            "http://127.0.0.1",
+            fixtures.episode_id(season + 1, episode + 1),
+            f"Benchmark Series - {season + 1}ª Temporada - Episódio {episode + 1}",
+            fixtures.season_id(season + 1),
+            position=episode + 1
+        )
+        blobs.append(json.dumps(media).encode("utf-8"))
+    return blobs
+
+def measure(name: str, blobs: list, build) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    items = [build(json.loads(blob)) for blob in blobs]
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del items
+
+    per_item = retained / len(blobs)
+    return {
+        "name": name,
+        "episodes": len(blobs),
+        "bytes_per_episode": round(per_item, 1),
+        "mib_per_100k": round(per_item * 100_000 / 2 ** 20, 2),
+        "peak_mib": round(peak / 2 ** 20, 2),
+        "build_s": round(elapsed, 3)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--episodes", type=int, default=100_000)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    blobs = payloads(args.episodes)
+    results = [
+        measure("dict", blobs, lambda media: media),
+        measure("Media", blobs, Media.from_dict),
+        measure("Media (no lazy groups)", blobs, lambda media: Media.from_dict(media, lazy_groups=False))
+    ]
+
+    for result in results:
+        print(
+            f"{result['name']:<24} {result['bytes_per_episode']:>9.1f} B/episode "
+            f"{result['mib_per_100k']:>9.2f} MiB/100k  build {result['build_s']:.3f}s"
+        )
+
+    if args.output:
+        args.output.write_text(json.dumps({"python": sys.version.split()[0], "results": results}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Local stand-in for the Looke API used by the benchmarks.
+
+Serves findmedia (with PageNumber/RecordsPerPage paging) from the fixtures catalog and subtitle
+blobs from /subtitles/<name>.<vtt|ttml|ismt>, with configurable latency and error rate.
+
+Usage:
+    python benchmarks/mock_server.py --port 8080 --latency-ms 20 --error-rate 0.01
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+import fixtures
+
+class MockHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # With the default backlog of 5, connections past it stall on SYN retransmits at high concurrency
+    # and the benchmarks measure the mock instead of the client.
+    request_queue_size = 256
+
+class MockLookeServer:
+    """
+    Threaded HTTP server emulating the findmedia endpoint and the subtitle CDN.
+    """
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        seasons: int = 4,
+        episodes: int = 10,
+        cues: int = 600,
+        seed: Optional[int] = 0
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.counters = {"findmedia": 0, "subtitles": 0, "errors": 0, "bytes": 0}
+        self._lock = threading.Lock()
+
+        self.httpd = MockHTTPServer((host, port), self._handler())
+        self.catalog = fixtures.catalog(self.url, seasons=seasons, episodes=episodes)
+        self.subtitles = {name: build(cues) for name, build in fixtures.SUBTITLES.items()}
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockLookeServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += value
+
+    def delay(self) -> bool:
+        with self._lock:
+            delay = self.latency + self.random.uniform(0, self.jitter)
+            fail = self.random.random() < self.error_rate
+        if delay:
+            time.sleep(delay)
+        return fail
+
+    def find_media(self, payload: dict) -> dict:
+        media = self.catalog.get(payload["Criteria"]["MediaId"])
+        if not media:
+            return {"FindMediaResult": {"Movies": [], "Message": "Not found"}}
+
+        options = payload.get("Options", {})
+        page_size = options.get("RecordsPerPage", 50)
+        page_number = options.get("PageNumber", 0)
+
+        media = dict(media)
+        media["Childs"] = media["Childs"][page_number * page_size:(page_number + 1) * page_size]
+
+        return {"FindMediaResult": {"Movies": [self.project(media, payload)]}}
+
+    @staticmethod
+    def project(media: dict, payload: dict) -> dict:
+        """
+        Keeps only the groups and properties requested in Groups/Entities, like the real API.
+        """
+        groups = {group["GroupName"]: group["GroupProperties"].split("|") for group in payload.get("Groups") or []}
+        entities = {entity["EntityName"]: entity["EntityProperties"].split("|") for entity in payload.get("Entities") or []}
+
+        def select(value, properties: list):
+            if isinstance(value, list):
+                return [select(item, properties) for item in value]
+            return {key: value[key] for key in properties if key in value}
+
+        result = {key: media[key] for key in ("Id", "ParentId", "FullTitle") if key in media}
+        for name, properties in groups.items():
+            if isinstance(media.get(name), (dict, list)):
+                result[name] = select(media[name], properties)
+        if "Subtitles" in result.get("FileInfo", {}):
+            result["FileInfo"]["Subtitles"] = select(result["FileInfo"]["Subtitles"], entities.get("Subtitles", []))
+        result["Childs"] = [MockLookeServer.project(child, payload) for child in media.get("Childs") or []]
+        return result
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def send(self, status: int, content: bytes, content_type: str, etag: Optional[str] = None) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                if etag:
+                    self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+                server.count("bytes", len(content))
+
+            def fail(self) -> None:
+                server.count("errors")
+                self.send(503, b'{"Message": "Service Unavailable"}', "application/json")
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+
+                if server.delay():
+                    return self.fail()
+
+                if self.path.rstrip("/").lower().endswith("/findmedia"):
+                    server.count("findmedia")
+                    return self.send(200, json.dumps(server.find_media(payload)).encode("utf-8"), "application/json")
+
+                self.send(404, b"{}", "application/json")
+
+            def do_GET(self):
+                if server.delay():
+                    return self.fail()
+
+                if self.path.startswith("/subtitles/"):
+                    extension = self.path.rsplit(".", 1)[-1]
+                    content = server.subtitles.get(extension)
+                    if content is not None:
+                        server.count("subtitles")
+                        etag = '"' + hashlib.md5(content).hexdigest() + '"'
+                        if self.headers.get("If-None-Match") == etag:
+                            return self.send(304, b"", "application/octet-stream", etag)
+                        return self.send(200, content, "application/octet-stream", etag)
+
+                self.send(404, b"", "text/plain")
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seasons", type=int, default=4)
+    parser.add_argument("--episodes", type=int, default=10)
+    args = parser.parse_args()
+
+    server = MockLookeServer(
+        host=args.host,
+        port=args.port,
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate,
+        seasons=args.seasons,
+        episodes=args.episodes
+    )
+    print(f"Mock Looke API listening on {server.url} (series {fixtures.SERIES_ID}, movie {fixtures.MOVIE_ID})")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
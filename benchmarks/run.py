@@ -0,0 +1,368 @@
+"""
+End-to-end benchmarks against the local mock Looke API.
+
+Scenarios:
+    find_media       find_media throughput with a thread pool of each --workers size
+    find_media_async AsyncLooke.find_medias throughput (requires httpx)
+    subrip           subrip --all-season wall time for a whole series with each --workers size
+    sniff            subtitle format detection throughput per format, checked against memory-mapped input
+    convert          subtitle conversion throughput per format (requires subby)
+    store            subrip of a whole series into a fresh output folder with a cold, then a warm subtitle store
+                     (requires subby)
+    archive          members appended per second to a zip and a tar archive, then checked to survive a run
+                     killed right after appending one more member
+
+Usage:
+    python benchmarks/run.py --latency-ms 20 --output results.json
+    python benchmarks/run.py --scenarios find_media,subrip --workers 1,8,32
+"""
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import fixtures
+
+from mock_server import MockLookeServer
+from pylooke import Looke, Transport, __version__
+
+def percentile(values: list, fraction: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+def timings_summary(timings: list) -> dict:
+    return {
+        "p50_ms": round(percentile(timings, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(timings, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(timings, 0.99) * 1000, 3)
+    }
+
+def media_ids(server: MockLookeServer, count: int) -> list:
+    ids = [media_id for media_id in server.catalog if media_id >= 1_000_000]
+    return [ids[index % len(ids)] for index in range(count)]
+
+def bench_find_media(server: MockLookeServer, args) -> list:
+    results = []
+
+    for workers in args.workers:
+        looke = Looke(transport=Transport(pool_maxsize=workers), urls={"service_media": server.url})
+        timings = []
+        errors = 0
+
+        def lookup(media_id: int) -> None:
+            nonlocal errors
+            start = time.perf_counter()
+            try:
+                looke.find_media(media_id)
+            except Exception:
+                errors += 1
+            timings.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(lookup, media_ids(server, args.requests)))
+        elapsed = time.perf_counter() - start
+
+        results.append({
+            "workers": workers,
+            "requests": args.requests,
+            "errors": errors,
+            "elapsed_s": round(elapsed, 4),
+            "requests_per_s": round(args.requests / elapsed, 2),
+            **timings_summary(timings),
+            "transport": looke.transport.stats.as_dict(),
+            "single_flight": looke.single_flight.stats()
+        })
+        looke.close()
+
+    return results
+
+def bench_find_media_async(server: MockLookeServer, args) -> list:
+    try:
+        from pylooke import AsyncLooke
+        import httpx  # noqa: F401
+    except ImportError:
+        return [{"skipped": "httpx is not installed"}]
+
+    async def run(workers: int) -> dict:
+        async with AsyncLooke(max_per_host=workers, urls={"service_media": server.url}) as looke:
+            start = time.perf_counter()
+            results = await looke.find_medias(media_ids(server, args.requests), return_exceptions=True)
+            elapsed = time.perf_counter() - start
+
+        return {
+            "max_per_host": workers,
+            "requests": args.requests,
+            "errors": sum(isinstance(result, Exception) for result in results),
+            "elapsed_s": round(elapsed, 4),
+            "requests_per_s": round(args.requests / elapsed, 2)
+        }
+
+    return [asyncio.run(run(workers)) for workers in args.workers]
+
+def bench_subrip(server: MockLookeServer, args) -> list:
+    from pylooke.utils.subrip import subrip
+
+    try:
+        import subby  # noqa: F401
+        convert_to_srt = True
+    except ImportError:
+        convert_to_srt = False
+
+    results = []
+
+    for workers in args.workers:
+        looke = Looke(transport=Transport(pool_maxsize=max(workers, 10)), urls={"service_media": server.url})
+        before = dict(server.counters)
+
+        with tempfile.TemporaryDirectory() as output_folder:
+            start = time.perf_counter()
+            statuses = subrip(
+                looke=looke,
+                media_id=fixtures.season_id(1),
+                output_folder=Path(output_folder),
+                all_season=True,
+                convert_to_srt=convert_to_srt,
+                keep=not convert_to_srt,
+                workers=workers
+            )
+            elapsed = time.perf_counter() - start
+
+        results.append({
+            "workers": workers,
+            "convert_to_srt": convert_to_srt,
+            "subtitles": len(statuses),
+            "failed": statuses.count(False),
+            "elapsed_s": round(elapsed, 4),
+            "findmedia_calls": server.counters["findmedia"] - before["findmedia"],
+            "subtitle_calls": server.counters["subtitles"] - before["subtitles"],
+            "transport": looke.transport.stats.as_dict(),
+            "single_flight": looke.single_flight.stats()
+        })
+        looke.close()
+
+    return results
+
+def bench_sniff(server: MockLookeServer, args) -> list:
+    from pylooke.utils import download, sniffer
+
+    samples = {**server.subtitles, "bilibili": fixtures.bilibili(), "error_page": fixtures.error_page()}
+
+    results = []
+    for name, data in samples.items():
+        timings = []
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            detection = sniffer.detect(data)
+            timings.append(time.perf_counter() - start)
+
+        # Downloads are sniffed memory-mapped, which must detect the same as bytes.
+        with tempfile.TemporaryDirectory() as folder:
+            path = Path(folder) / name
+            path.write_bytes(data)
+            with download.map_file(path) as view:
+                mapped = sniffer.detect(view)
+        if mapped != detection:
+            raise AssertionError(f"{name}: detected {detection} from bytes but {mapped} from a mapped file")
+
+        results.append({
+            "format": name,
+            "detected": detection.format.name,
+            "confidence": detection.confidence,
+            "size": len(data),
+            "median_us": round(statistics.median(timings) * 1_000_000, 3)
+        })
+
+    return results
+
+def bench_convert(server: MockLookeServer, args) -> list:
+    try:
+        import subby  # noqa: F401
+    except ImportError:
+        return [{"skipped": "subby is not installed"}]
+
+    from pylooke.utils import subtitle
+
+    results = []
+    for name, data in server.subtitles.items():
+        iterations = max(args.iterations // 100, 3)
+        failed = 0
+        start = time.perf_counter()
+        for _ in range(iterations):
+            try:
+                failed += subtitle.convert_bytes(data) is None
+            except Exception:
+                failed += 1
+        elapsed = time.perf_counter() - start
+
+        results.append({
+            "format": name,
+            "size": len(data),
+            "iterations": iterations,
+            "failed": failed,
+            "subtitles_per_s": round(iterations / elapsed, 2),
+            "mib_per_s": round(len(data) * iterations / elapsed / 1024 / 1024, 3)
+        })
+
+    return results
+
+def bench_store(server: MockLookeServer, args) -> list:
+    try:
+        import subby  # noqa: F401
+    except ImportError:
+        return [{"skipped": "subby is not installed"}]
+
+    from pylooke.utils.store import SubtitleStore
+    from pylooke.utils.subrip import subrip
+
+    workers = max(args.workers)
+    results = []
+
+    with tempfile.TemporaryDirectory() as store_folder:
+        store = SubtitleStore(path=Path(store_folder))
+        looke = Looke(transport=Transport(pool_maxsize=max(workers, 10)), urls={"service_media": server.url})
+
+        for run in ("cold", "warm"):
+            before = store.stats()
+            with tempfile.TemporaryDirectory() as output_folder:
+                start = time.perf_counter()
+                statuses = subrip(
+                    looke=looke,
+                    media_id=fixtures.season_id(1),
+                    output_folder=Path(output_folder),
+                    all_season=True,
+                    workers=workers,
+                    store=store
+                )
+                elapsed = time.perf_counter() - start
+
+            stats = store.stats()
+            results.append({
+                "store": run,
+                "workers": workers,
+                "subtitles": len(statuses),
+                "failed": statuses.count(False),
+                "elapsed_s": round(elapsed, 4),
+                "conversions": stats["misses"] - before["misses"],
+                "reused": stats["hits"] - before["hits"],
+                "store_bytes": stats["size"],
+                "links": stats["links"]
+            })
+
+        looke.close()
+        store.close()
+
+    return results
+
+# Appends one member to an existing archive and dies before it is synced or closed.
+CRASH_AFTER_ADD = """
+import os, sys
+sys.path.insert(0, sys.argv[3])
+from pylooke.utils.archive import SubtitleArchive
+archive = SubtitleArchive(sys.argv[1], sys.argv[2], sync_interval=3600)
+archive.add("crashed.srt", b"1\\n00:00:01,000 --> 00:00:02,000\\nStill here\\n\\n")
+if sys.argv[2] == "zip":
+    archive._archive.fp.flush()
+os._exit(1)
+"""
+
+def bench_archive(server: MockLookeServer, args) -> list:
+    from pylooke.utils.archive import ARCHIVE_FORMATS, SubtitleArchive
+
+    samples = list(server.subtitles.values())
+    root = str(Path(__file__).resolve().parent.parent)
+    results = []
+
+    for format in ARCHIVE_FORMATS:
+        with tempfile.TemporaryDirectory() as folder:
+            path = Path(folder) / f"subtitles.{format}"
+            start = time.perf_counter()
+            with SubtitleArchive(path, format) as archive:
+                for index in range(args.requests):
+                    archive.add(f"Series - S01/E{index:05d}.srt", samples[index % len(samples)] + b"%d" % index)
+            elapsed = time.perf_counter() - start
+
+            # A member written over the central directory must not cost the members before it.
+            subprocess.run([sys.executable, "-c", CRASH_AFTER_ADD, str(path), format, root], check=False)
+            with SubtitleArchive(path, format) as archive:
+                recovered = len(archive.members)
+            if recovered != args.requests + 1:
+                raise AssertionError(f"{format}: {recovered} members recovered after a crash, expected {args.requests + 1}")
+
+            results.append({
+                "format": format,
+                "members": args.requests,
+                "elapsed_s": round(elapsed, 4),
+                "members_per_s": round(args.requests / elapsed, 2),
+                "recovered_after_crash": recovered
+            })
+
+    return results
+
+SCENARIOS = {
+    "find_media": bench_find_media,
+    "find_media_async": bench_find_media_async,
+    "subrip": bench_subrip,
+    "sniff": bench_sniff,
+    "convert": bench_convert,
+    "store": bench_store,
+    "archive": bench_archive
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--workers", default="1,8,32")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--seasons", type=int, default=4)
+    parser.add_argument("--episodes", type=int, default=10)
+    parser.add_argument("--cues", type=int, default=600)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+    args.workers = [int(workers) for workers in args.workers.split(",")]
+
+    results = {
+        "pylooke": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "scenarios": {}
+    }
+
+    with MockLookeServer(
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate,
+        seasons=args.seasons,
+        episodes=args.episodes,
+        cues=args.cues
+    ) as server:
+        for name in args.scenarios.split(","):
+            print(f"Running {name}...", file=sys.stderr)
+            results["scenarios"][name] = SCENARIOS[name](server, args)
+        results["server"] = dict(server.counters)
+
+    output = json.dumps(results, indent=2, default=str)
+    if args.output:
+        args.output.write_text(output)
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
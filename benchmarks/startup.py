@@ -0,0 +1,94 @@
+"""
+Cold-start benchmark for the pylooke CLI.
+
+Runs `pylooke version` and `pylooke subrip --help` in fresh interpreters, reports the wall time
+of each command, and parses `python -X importtime` to list the heaviest imports.
+
+Usage:
+    python benchmarks/startup.py [--runs 10] [--output startup.json]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+COMMANDS = {
+    "version": ["version"],
+    "subrip": ["subrip", "--help"]
+}
+
+def run_command(args: list, runs: int) -> dict:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "pylooke.cli", *args],
+            cwd=ROOT,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=True
+        )
+        timings.append(time.perf_counter() - start)
+
+    return {
+        "runs": runs,
+        "min_ms": round(min(timings) * 1000, 2),
+        "median_ms": round(statistics.median(timings) * 1000, 2),
+        "max_ms": round(max(timings) * 1000, 2)
+    }
+
+def import_times(module: str, top: int) -> dict:
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+    imports = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        imports.append({"module": name.strip(), "self_us": int(self_us), "cumulative_us": int(cumulative_us)})
+
+    total = max((entry["cumulative_us"] for entry in imports if entry["module"] == module), default=0)
+    imports.sort(key=lambda entry: entry["self_us"], reverse=True)
+
+    return {
+        "module": module,
+        "cumulative_us": total,
+        "heaviest": imports[:top],
+        "loaded": sorted({entry["module"].split(".")[0] for entry in imports})
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    results = {
+        "python": sys.version.split()[0],
+        "commands": {name: run_command(command, args.runs) for name, command in COMMANDS.items()},
+        "imports": {module: import_times(module, args.top) for module in ("pylooke", "pylooke.cli")}
+    }
+
+    for name, timing in results["commands"].items():
+        print(f"pylooke {name:<8} median {timing['median_ms']:>8.2f} ms (min {timing['min_ms']:.2f} ms)")
+    for module, timing in results["imports"].items():
+        print(f"import {module:<12} {timing['cumulative_us'] / 1000:>8.2f} ms")
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Benchmark of subtitle post-processing on per-cue objects and on pylooke.utils.timeline.CueTimeline.
+
+Builds a long synthetic subtitle (several episodes' worth of cues, with short gaps, overlaps,
+repeated lines, blank lines and empty cues), then retimes it from 23.976 to 25 fps, shifts it,
+closes short gaps, fixes overlaps and renders it to SRT: once on srt.Subtitle objects with
+srt.compose (what subby's SubRipFile.export runs), and once per installed timeline backend.
+Every output is checked to be identical to the per-cue one. Memory is the size retained by the
+cues, measured with tracemalloc.
+
+Without the srt package, a copy of its Subtitle ordering and compose rules is used as the reference.
+
+Usage:
+    python benchmarks/timeline.py [--cues 200000] [--iterations 5] [--output timeline.json]
+"""
+import argparse
+import gc
+import json
+import random
+import re
+import sys
+import time
+import tracemalloc
+
+from datetime import timedelta
+from fractions import Fraction
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pylooke.utils import timeline
+from pylooke.utils.timeline import CueTimeline
+
+try:
+    import srt
+except ImportError:
+    srt = None
+
+SOURCE_FPS = 23.976
+TARGET_FPS = 25
+SHIFT_MS = -1500
+MAX_GAP_MS = 120
+
+_MICROSECOND = timedelta(microseconds=1)
+_ZERO = timedelta(0)
+
+class Subtitle:
+    """
+    Stand-in for srt.Subtitle: same fields and ordering.
+    """
+    def __init__(self, index, start, end, content, proprietary=""):
+        self.index = index
+        self.start = start
+        self.end = end
+        self.content = content
+        self.proprietary = proprietary
+
+    def __lt__(self, other):
+        return (self.start, self.end, self.index) < (other.start, other.end, other.index)
+
+def _timestamp(value: timedelta) -> str:
+    hours, rest = divmod(value.seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return "%02d:%02d:%02d,%03d" % (hours + value.days * 24, minutes, seconds, value.microseconds // 1000)
+
+def _compose(subtitles) -> str:
+    # srt.compose with its defaults: sort, skip, reindex from 1 and legalize the content.
+    blocks = []
+    number = 0
+    for subtitle in sorted(subtitles):
+        if not subtitle.content.strip() or subtitle.start < _ZERO or subtitle.start >= subtitle.end:
+            continue
+        number += 1
+        content = subtitle.content
+        if not content or content[0] == "\n" or "\n\n" in content:
+            content = re.sub(r"\n\n+", "\n", content.strip("\n"))
+        proprietary = f" {subtitle.proprietary}" if subtitle.proprietary else ""
+        blocks.append(
+            f"{number}\n{_timestamp(subtitle.start)} --> {_timestamp(subtitle.end)}{proprietary}\n{content}\n\n"
+        )
+    return "".join(blocks)
+
+Cue = srt.Subtitle if srt else Subtitle
+compose = srt.compose if srt else _compose
+
+def cues(count: int, seed: int = 0) -> list:
+    """
+    (index, start, end, content) of count cues: mostly 2s apart, some followed within a few
+    frames or overlapping the next one, some sharing their text, a few blank or padded with blank lines.
+    """
+    rng = random.Random(seed)
+    lines = [f"Line {index} of the benchmark subtitle\nwith a second row" for index in range(count // 4 + 1)]
+    items = []
+    start = 0
+
+    for index in range(count):
+        duration = rng.randint(800, 4000)
+        roll = rng.random()
+        if roll < 0.01:
+            content = ""
+        elif roll < 0.02:
+            content = "\n" + rng.choice(lines) + "\n\n"
+        elif roll < 0.5:
+            content = rng.choice(lines)
+        else:
+            content = f"Cue {index}\n- with dialogue"
+        items.append((index + 1, start * 1000, (start + duration) * 1000, content))
+
+        gap = rng.random()
+        start += duration + (rng.randint(-300, -1) if gap < 0.1 else rng.randint(1, 100) if gap < 0.4 else 500)
+
+    # Converters do not always emit cues in order.
+    head = items[:100]
+    rng.shuffle(head)
+    items[:100] = head
+    return items
+
+def subtitles(items: list) -> list:
+    return [
+        Cue(index=index, start=timedelta(microseconds=start), end=timedelta(microseconds=end), content=content)
+        for index, start, end, content in items
+    ]
+
+def process_objects(subs: list) -> str:
+    ratio = Fraction(SOURCE_FPS).limit_denominator(timeline.MAX_FRAMERATE_DENOMINATOR) / TARGET_FPS
+    delta = timedelta(milliseconds=SHIFT_MS)
+    max_gap = timedelta(milliseconds=MAX_GAP_MS)
+
+    for sub in subs:
+        sub.start = max(timedelta(microseconds=round(ratio * (sub.start // _MICROSECOND))) + delta, _ZERO)
+        sub.end = max(timedelta(microseconds=round(ratio * (sub.end // _MICROSECOND))) + delta, _ZERO)
+
+    subs.sort()
+    for sub, following in zip(subs, subs[1:]):
+        if _ZERO < following.start - sub.end <= max_gap:
+            sub.end = following.start
+
+    subs.sort()
+    for sub, following in zip(subs, subs[1:]):
+        if sub.end > following.start > sub.start:
+            sub.end = following.start
+
+    return compose(subs)
+
+def process_timeline(subs: list, backend: str) -> str:
+    return (
+        CueTimeline.from_subtitles(subs, backend=backend)
+        .rescale(SOURCE_FPS, TARGET_FPS)
+        .shift(SHIFT_MS)
+        .merge_gaps(MAX_GAP_MS)
+        .fix_overlaps()
+        .to_srt()
+    )
+
+def measure(name: str, items: list, process, iterations: int, reference: str = None) -> dict:
+    seconds = []
+    output = None
+    for _ in range(iterations):
+        subs = subtitles(items)
+        start = time.perf_counter()
+        output = process(subs)
+        seconds.append(time.perf_counter() - start)
+
+    if reference is not None and output != reference:
+        raise AssertionError(f"{name} output differs from the per-cue objects output")
+
+    return {"name": name, "cues": len(items), "ms": round(min(seconds) * 1000, 2), "output": output}
+
+def retained(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    value = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del value
+    return size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cues", type=int, default=200_000)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    items = cues(args.cues)
+    baseline = measure(f"objects ({'srt' if srt else 'reference'})", items, process_objects, args.iterations)
+    baseline["bytes_per_cue"] = round(retained(lambda: subtitles(items)) / len(items), 1)
+    results = [baseline]
+
+    for backend in timeline.BACKENDS:
+        if backend == "numpy" and timeline.numpy is None:
+            print(f"timeline ({backend}) not installed")
+            continue
+        result = measure(
+            f"timeline ({backend})",
+            items,
+            lambda subs: process_timeline(subs, backend),
+            args.iterations,
+            baseline["output"]
+        )
+        subs = subtitles(items)
+        result["bytes_per_cue"] = round(retained(lambda: CueTimeline.from_subtitles(subs, backend=backend)) / len(items), 1)
+        results.append(result)
+
+    for result in results:
+        result.pop("output")
+        print(
+            f"{result['name']:<20} {result['cues']:>8} cues  {result['ms']:>9.2f} ms  "
+            f"{result['ms'] / baseline['ms']:>6.2f}x  {result['bytes_per_cue']:>7.1f} B/cue"
+        )
+
+    if args.output:
+        args.output.write_text(json.dumps({"python": sys.version.split()[0], "results": results}, indent=2))
+
+if __name__ == "__main__":
+    main()
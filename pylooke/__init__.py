@@ -1,6 +1,19 @@
-from pylooke.encripta.encripta_crypto import EncriptaCrypto
-from pylooke.encripta.looke import Looke
-
 __version__ = "1.0.1"
 
-__all__ = ("Looke", "EncriptaCrypto", "__version__")
\ No newline at end of file
+__all__ = ("Looke", "AsyncLooke", "EncriptaCrypto", "Transport", "__version__")
+
+_LAZY = {
+    "Looke": "pylooke.encripta.looke",
+    "AsyncLooke": "pylooke.encripta.async_looke",
+    "EncriptaCrypto": "pylooke.encripta.encripta_crypto",
+    "Transport": "pylooke.utils.transport"
+}
+
+def __getattr__(name: str):
+    # Import the client classes on first access, so "import pylooke" (and the CLI) stays cheap.
+    if name in _LAZY:
+        import importlib
+        value = getattr(importlib.import_module(_LAZY[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,16 +1,22 @@
-import re
+import json
+import time
 import logging
 
-from typing import Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional, TextIO, Tuple
 from pathlib import Path
 from datetime import datetime
 
-from pathvalidate import sanitize_filename
-
 import click
 
-from pylooke import Looke, __version__
-from pylooke.utils import subtitle
+from pylooke import __version__
+from pylooke.utils.cache import DEFAULT_CACHE_DIR
+
+if TYPE_CHECKING:
+    from pylooke import Looke
+    from pylooke.utils.index import CatalogIndex
+    from pylooke.utils.tracing import Profiler
 
 @click.group()
 @click.option("-d", "--debug", is_flag=True, default=False, help="Enable debug level logs.")
@@ -32,13 +38,35 @@ def version():
     logger.info("https://github.com/MateusTars/pylooke")
 
 @main.command()
-@click.argument("media_id", type=str)
+@click.argument("media_id", type=str, required=False)
+@click.option(
+    "-f",
+    "--from-file",
+    type=click.File("r"),
+    default=None,
+    help="Read media IDs or URLs, one per line, from a file ('-' for stdin) and process them with one client."
+)
+@click.option(
+    "-r",
+    "--report",
+    type=click.File("w"),
+    default="-",
+    help="Write a JSON line per media ID processed with --from-file to this file (default: stdout)."
+)
 @click.option(
     "-l",
     "--language",
     type=str,
     default="pt-BR",
-    help="Specify the language code for the subtitles to download (default: pt-BR)."
+    help="Specify the language codes for the subtitles to download, comma separated, or 'all' (default: pt-BR)."
+)
+@click.option(
+    "-F",
+    "--formats",
+    type=str,
+    default="srt",
+    help="Comma separated subtitle formats to save (srt, vtt, ttml), in order of preference of the "
+         "source converted to SRT. A server-side SRT is used as is when available (default: srt)."
 )
 @click.option(
     "-o",
@@ -75,125 +103,541 @@ def version():
     default=True,
     help="Convert the downloaded subtitles to SRT format (default: True)."
 )
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of seasons and subtitles processed concurrently, and with --from-file the "
+         "limit of media IDs and requests in flight (default: 1)."
+)
+@click.option(
+    "-w",
+    "--convert-workers",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Convert subtitles on a pool of this many processes instead of in the download threads."
+)
+@click.option(
+    "--timeout",
+    type=click.FloatRange(min=0, min_open=True),
+    default=60.0,
+    help="Seconds to wait for a connection or a response before retrying (default: 60)."
+)
+@click.option(
+    "--retries",
+    type=click.IntRange(min=0),
+    default=3,
+    help="Retries of media lookups and subtitle downloads on timeouts, 429 and 5xx responses (default: 3)."
+)
+@click.option(
+    "--rate-limit",
+    type=click.FloatRange(min=0, min_open=True),
+    default=None,
+    help="Maximum requests per second sent to each host (default: unlimited)."
+)
+@click.option(
+    "--profile",
+    type=str,
+    is_flag=False,
+    flag_value="-",
+    default=None,
+    help="Print a latency/bytes summary table at the end of the run, "
+         "and write a Chrome trace JSON when a path is given (--profile trace.json)."
+)
+@click.option(
+    "--max-size",
+    type=click.FloatRange(min=0, min_open=True),
+    default=64.0,
+    help="Abort subtitle downloads larger than this many MiB (default: 64)."
+)
+@click.option(
+    "--no-manifest",
+    is_flag=True,
+    default=False,
+    help="Process every subtitle again instead of skipping the ones recorded as finished in the output folder."
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    default=False,
+    help="Always fetch media details from the API instead of the local cache."
+)
+@click.option(
+    "--cache-dir",
+    type=Path,
+    default=DEFAULT_CACHE_DIR,
+    help=f"Specify the folder of the media details cache and the subtitle store (default: {DEFAULT_CACHE_DIR})."
+)
+@click.option(
+    "--no-store",
+    is_flag=True,
+    default=False,
+    help="Convert every subtitle again instead of reusing the conversions held by the subtitle store."
+)
+@click.option(
+    "--store-size",
+    type=click.FloatRange(min=0, min_open=True),
+    default=512.0,
+    help="Evict the least recently used subtitles once the store is over this many MiB (default: 512)."
+)
+@click.option(
+    "--hardlink",
+    is_flag=True,
+    default=False,
+    help="Hardlink outputs to the subtitle store when they cannot be reflinked, instead of copying them. "
+         "Hardlinked outputs share one file with the store, so they must not be edited in place."
+)
+@click.option(
+    "--archive",
+    type=click.Choice(["zip", "tar"]),
+    default=None,
+    help="Append the subtitles to an archive in the output folder as they are finished, "
+         "with the same 'Series - SXX/' layout, instead of writing a file per subtitle."
+)
+@click.option(
+    "--archive-scope",
+    type=click.Choice(["run", "series"]),
+    default="run",
+    help="Write one archive for the whole run (subtitles.zip) or one per series and season folder (default: run)."
+)
 def subrip(
-    media_id: str,
+    media_id: Optional[str],
+    from_file: Optional[TextIO],
+    report: TextIO,
     language: str,
+    formats: str,
     output_folder: Path,
     season: Optional[int],
     all_season: bool,
     keep: bool,
-    convert_to_srt: bool
+    convert_to_srt: bool,
+    jobs: int,
+    convert_workers: Optional[int],
+    timeout: float,
+    retries: int,
+    rate_limit: Optional[float],
+    profile: Optional[str],
+    max_size: float,
+    no_manifest: bool,
+    no_cache: bool,
+    cache_dir: Path,
+    no_store: bool,
+    store_size: float,
+    hardlink: bool,
+    archive: Optional[str],
+    archive_scope: str
 ):
     """
     Download and process subtitles for the specified media ID.
     """
-    logger = logging.getLogger("subrip")
+    from pylooke import Looke, Transport
+    from pylooke.utils.archive import ArchiveOutput
+    from pylooke.utils.cache import MediaCache
+    from pylooke.utils.manifest import Manifest
+    from pylooke.utils.policy import RetryPolicy
+    from pylooke.utils.store import SubtitleStore
+    from pylooke.utils.subrip import parse_formats, parse_media_id, subrip as subrip_media
+    from pylooke.utils.tracing import Profiler
 
-    if media_id[:4] == "http":
-        media_id = media_id.split("/")[-1]
-
-    if not media_id.isdigit():
-        raise click.ClickException(f"Invalid media ID: '{media_id}'. It must be a numeric value.")
+    logger = logging.getLogger("subrip")
 
-    media_id = int(media_id)
+    if (media_id is None) == (from_file is None):
+        raise click.UsageError("Specify exactly one of MEDIA_ID or --from-file.")
+
+    try:
+        formats = parse_formats(formats)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--formats")
+
+    profiler = Profiler() if profile else None
+
+    looke = Looke(
+        transport=Transport(
+            pool_maxsize=max(jobs, 10),
+            max_in_flight=jobs if from_file else None,
+            policy=RetryPolicy(timeout=timeout, retries=retries),
+            rate_limit=rate_limit
+        ),
+        cache=None if no_cache else MediaCache(path=cache_dir),
+        hooks=[profiler] if profiler else None
+    )
+
+    archive_output = ArchiveOutput(output_folder, format=archive, scope=archive_scope) if archive else None
+
+    options = dict(
+        language=language,
+        formats=formats,
+        output_folder=output_folder,
+        season=season,
+        all_season=all_season,
+        keep=keep,
+        convert_to_srt=convert_to_srt,
+        workers=jobs,
+        convert_workers=convert_workers,
+        manifest=None if no_manifest else Manifest(
+            output_folder,
+            exists=archive_output.__contains__ if archive_output else None
+        ),
+        max_size=int(max_size * 1024 * 1024),
+        store=None if no_store else SubtitleStore(
+            path=cache_dir / "store",
+            max_size=int(store_size * 1024 * 1024),
+            hardlink=hardlink
+        ),
+        archive=archive_output
+    )
+
+    try:
+        if from_file:
+            failed = 0
+            for entry in _subrip_batch(looke, from_file, jobs, options):
+                failed += entry["status"] != "ok"
+                report.write(json.dumps(entry) + "\n")
+                report.flush()
+        else:
+            try:
+                media_id = parse_media_id(media_id)
+            except ValueError as e:
+                raise click.ClickException(str(e))
 
-    logger.info(f"Starting subrip for media id: {media_id}")
+            logger.info(f"Starting subrip for media id: {media_id}")
 
-    looke = Looke()
+            statuses = subrip_media(looke=looke, media_id=media_id, **options)
 
-    data = looke.find_media(media_id)
+            if not all(statuses):
+                raise click.ClickException(
+                    f"Subtitle download or conversion failed for {statuses.count(False)} of {len(statuses)} subtitles."
+                )
+    finally:
+        logger.debug(f"Connection stats: {looke.transport.stats.as_dict()}")
+        logger.debug(f"Coalesced findmedia calls: {looke.single_flight.stats()}")
+        if looke.cache:
+            logger.debug(f"Cache stats: {looke.cache.stats()}")
+        if profiler:
+            _export_profile(profiler, looke, profile)
+        if archive_output:
+            archive_output.close()
+        if options["store"]:
+            logger.debug(f"Subtitle store stats: {options['store'].stats()}")
+            options["store"].close()
+        if options["manifest"]:
+            options["manifest"].close()
+        looke.close()
 
-    episodes = []
-    if season or all_season:
-        parent_id = data.get("ParentId")
-        seasons_data = []
-        if parent_id:
-            seasons_data = looke.find_media(
-                media_id=parent_id,
-                groups={
-                    "GroupName": "PlayDetails",
-                    "GroupProperties": "LastPosition|Status"
-                }
-            )
+    logger.info("Finished.")
 
-        if parent_id and seasons_data and all(
-            s["ParentId"] == parent_id
-            for s in seasons_data["Childs"]
-        ):
-            for s in seasons_data["Childs"]:
-                episodes.extend(
-                    looke.find_media(media_id=s["Id"])["Childs"]
-                )
-        else:
-            for episode in data.get("Childs", []):
-                episodes.append(episode)
+    if from_file and failed:
+        raise click.ClickException(f"{failed} media IDs failed, see the report.")
 
-    medias = episodes or [data]
+@main.command()
+@click.option("--host", type=str, default="127.0.0.1", help="Address to listen on (default: 127.0.0.1).")
+@click.option("--port", type=click.IntRange(min=0, max=65535), default=8787, help="Port to listen on (default: 8787).")
+@click.option(
+    "--unix-socket",
+    type=Path,
+    default=None,
+    help="Listen on this Unix socket instead of host and port."
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=32,
+    help="Number of find_media and children requests served at the same time (default: 32)."
+)
+@click.option(
+    "--max-conversions",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Number of subtitle conversions run at the same time (default: --convert-workers or the number of CPUs)."
+)
+@click.option(
+    "-w",
+    "--convert-workers",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Convert subtitles on a pool of this many processes instead of in the request threads."
+)
+@click.option(
+    "--queue-timeout",
+    type=click.FloatRange(min=0),
+    default=10.0,
+    help="Seconds a request waits for a free slot before it is answered 503 (default: 10)."
+)
+@click.option(
+    "--timeout",
+    type=click.FloatRange(min=0, min_open=True),
+    default=60.0,
+    help="Seconds to wait for a connection or a response before retrying (default: 60)."
+)
+@click.option(
+    "--retries",
+    type=click.IntRange(min=0),
+    default=3,
+    help="Retries of media lookups on timeouts, 429 and 5xx responses (default: 3)."
+)
+@click.option(
+    "--rate-limit",
+    type=click.FloatRange(min=0, min_open=True),
+    default=None,
+    help="Maximum requests per second sent to each host (default: unlimited)."
+)
+@click.option(
+    "--max-size",
+    type=click.FloatRange(min=0, min_open=True),
+    default=64.0,
+    help="Reject subtitles larger than this many MiB for conversion (default: 64)."
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    default=False,
+    help="Always fetch media details from the API instead of the local cache."
+)
+@click.option(
+    "--cache-dir",
+    type=Path,
+    default=DEFAULT_CACHE_DIR,
+    help=f"Specify the folder of the media details cache (default: {DEFAULT_CACHE_DIR})."
+)
+def serve(
+    host: str,
+    port: int,
+    unix_socket: Optional[Path],
+    jobs: int,
+    max_conversions: Optional[int],
+    convert_workers: Optional[int],
+    queue_timeout: float,
+    timeout: float,
+    retries: int,
+    rate_limit: Optional[float],
+    max_size: float,
+    no_cache: bool,
+    cache_dir: Path
+):
+    """
+    Serve find_media, children and subtitle conversion over HTTP with one warm client.
+    """
+    from pylooke import Looke, Transport
+    from pylooke.utils.cache import MediaCache
+    from pylooke.utils.policy import RetryPolicy
+    from pylooke.utils.server import LookeService, make_server
+
+    logger = logging.getLogger("serve")
+
+    service = LookeService(
+        looke=Looke(
+            transport=Transport(
+                pool_maxsize=max(jobs, 10),
+                policy=RetryPolicy(timeout=timeout, retries=retries),
+                rate_limit=rate_limit
+            ),
+            cache=None if no_cache else MediaCache(path=cache_dir)
+        ),
+        max_api_calls=jobs,
+        max_conversions=max_conversions,
+        convert_workers=convert_workers,
+        queue_timeout=queue_timeout,
+        max_body_size=int(max_size * 1024 * 1024)
+    )
+
+    try:
+        server = make_server(service, host=host, port=port, unix_socket=unix_socket)
+    except OSError as e:
+        service.close()
+        raise click.ClickException(f"Cannot listen on {unix_socket or f'{host}:{port}'}: {e}")
+
+    address = unix_socket or "http://{}:{}".format(*server.server_address[:2])
+    logger.info(f"Serving on {address}, press Ctrl+C to stop.")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if unix_socket:
+            unix_socket.unlink(missing_ok=True)
+        service.close()
+
+    logger.info("Stopped.")
+
+@main.group()
+@click.option(
+    "--index-dir",
+    type=Path,
+    default=DEFAULT_CACHE_DIR,
+    help=f"Specify the folder of the catalog index (default: {DEFAULT_CACHE_DIR})."
+)
+@click.pass_context
+def index(ctx: click.Context, index_dir: Path):
+    """
+    Build and query a local catalog index of find_media results.
+    """
+    from pylooke.utils.index import CatalogIndex
 
-    for result in medias:
-        subtitles = result["FileInfo"].get("Subtitles", [])
+    ctx.obj = ctx.with_resource(CatalogIndex(path=index_dir))
 
-        full_title = result["FullTitle"]
-        year = result["Metadata"].get("Year", 0)
-        id_ = result["Id"]
+@index.command()
+@click.argument("media_ids", type=str, nargs=-1, required=True)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of seasons expanded concurrently (default: 1)."
+)
+@click.option(
+    "--max-age",
+    type=click.FloatRange(min=0),
+    default=None,
+    help="Skip series and movies indexed less than this many seconds ago."
+)
+@click.pass_obj
+def crawl(catalog: "CatalogIndex", media_ids: Tuple[str, ...], jobs: int, max_age: Optional[float]):
+    """
+    Index the whole tree (series, seasons and episodes) of the specified media IDs.
+    """
+    from pylooke import Looke, Transport
+    from pylooke.utils.subrip import parse_media_id
 
-        if not subtitles:
-            logger.warning(f"No subtitle for {full_title} - {year} (ID: {id_}).")
-            continue
+    logger = logging.getLogger("index")
 
-        if result["SerieInfo"].get("Position"):
-            season_number = re.search(r"(\d+)ª", full_title).group(1)
-            if season != int(season_number) and not all_season:
-                continue
-            series_dir = Path(
-                sanitize_filename(
-                    filename=f"{full_title.split(' - ')[0].strip()} - S{season_number.zfill(2)}"
-                )
-            )
-            folder = output_folder / series_dir
-        else:
-            folder = output_folder / Path(sanitize_filename(filename=f"{full_title} - {year}"))
+    try:
+        media_ids = [parse_media_id(media_id) for media_id in media_ids]
+    except ValueError as e:
+        raise click.ClickException(str(e))
 
-        folder.mkdir(parents=True, exist_ok=True)
+    with Looke(transport=Transport(pool_maxsize=max(jobs, 10))) as looke:
+        for media_id in media_ids:
+            count = catalog.crawl(looke, media_id, workers=jobs, max_age=max_age)
+            logger.info(f"Indexed {count} medias for media id: {media_id}")
 
-        logger.info(f"Downloading subtitle for {full_title} - {year} (ID: {id_}).")
+@index.command()
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of seasons expanded concurrently (default: 1)."
+)
+@click.option(
+    "--max-age",
+    type=click.FloatRange(min=0),
+    default=None,
+    help="Only crawl again series and movies indexed more than this many seconds ago (default: all)."
+)
+@click.pass_obj
+def refresh(catalog: "CatalogIndex", jobs: int, max_age: Optional[float]):
+    """
+    Crawl again the series and movies already indexed.
+    """
+    from pylooke import Looke, Transport
 
-        for subtitle_data in subtitles:
-            if subtitle_data["Code"].lower() != language.lower():
-                continue
+    with Looke(transport=Transport(pool_maxsize=max(jobs, 10))) as looke:
+        count = catalog.refresh(looke, max_age=max_age, workers=jobs)
 
-            logger.info(
-                f"Subtitle Name: {subtitle_data['Name']} - Language Code: {subtitle_data['Code']}"
-            )
+    logging.getLogger("index").info(f"Indexed {count} medias, {catalog.stats()}")
 
-            subtitle_url = subtitle_data["UrlVTT"]
+@index.command()
+@click.argument("media_id", type=int)
+@click.pass_obj
+def show(catalog: "CatalogIndex", media_id: int):
+    """
+    Print an indexed media with its parent, children and subtitles.
+    """
+    media = catalog.get(media_id)
+    if media is None:
+        raise click.ClickException(f"Media id {media_id} is not indexed.")
+
+    media["parent"] = catalog.parent(media_id)
+    media["children"] = [child["id"] for child in catalog.children(media_id)]
+    media["subtitles"] = catalog.subtitles(media_id)
+    _echo_rows([media])
+
+@index.command()
+@click.argument("media_id", type=int)
+@click.option("-l", "--language", type=str, default=None, help="Only episodes with a subtitle in this language.")
+@click.option("-s", "--season", type=int, default=None, help="Only episodes of this season.")
+@click.pass_obj
+def episodes(catalog: "CatalogIndex", media_id: int, language: Optional[str], season: Optional[int]):
+    """
+    List the indexed episodes of a series or season.
+    """
+    _echo_rows(catalog.episodes(media_id, language=language, season=season))
 
-            filename = sanitize_filename(
-                filename=f"{full_title} {year} {subtitle_data['Code']} {id_}.{subtitle_url.split('.')[-1]}"
-            )
+@index.command()
+@click.argument("text", type=str)
+@click.option("--limit", type=click.IntRange(min=1), default=50, help="Maximum number of results (default: 50).")
+@click.pass_obj
+def search(catalog: "CatalogIndex", text: str, limit: int):
+    """
+    Search indexed medias by title.
+    """
+    _echo_rows(catalog.search(text, limit=limit))
 
-            file = folder / filename
+def _echo_rows(rows: Iterable[dict]) -> None:
+    for row in rows:
+        click.echo(json.dumps(row, ensure_ascii=False))
 
-            file.write_bytes(
-                looke.send_request(
-                    method="GET",
-                    url=subtitle_url
-                ).content
-            )
+def _export_profile(profiler: "Profiler", looke: "Looke", profile: str) -> None:
+    """
+    Prints the profiler summary to stderr and, unless profile is '-', writes its Chrome trace to that path.
+    """
+    stats = looke.transport.stats
 
-            if convert_to_srt:
-                status = subtitle.convert(
-                    file=file
-                )
+    click.echo(profiler.summary(), err=True)
+    click.echo(
+        f"connections: {stats.handshakes} handshakes for {stats.requests} requests "
+        f"(reuse ratio {stats.reuse_ratio:.2f})",
+        err=True
+    )
+    click.echo(f"findmedia: {looke.single_flight.shared} calls coalesced into in-flight ones", err=True)
 
-                if not status:
-                    raise click.ClickException("Subtitle conversion failed.")
+    if profile != "-":
+        profiler.save_chrome_trace(Path(profile))
+        click.echo(f"Chrome trace saved to: {profile}", err=True)
 
-            if not keep:
-                file.unlink()
+def _subrip_batch(looke: "Looke", lines: Iterable[str], jobs: int, options: dict) -> Iterator[dict]:
+    """
+    Runs subrip for every media ID or URL in lines on one shared client, yielding a report entry
+    per ID in input order. At most jobs IDs are processed (and buffered) at the same time.
+    """
+    from pylooke.utils.subrip import parse_media_id, subrip as subrip_media
 
-    logger.info("Finished.")
+    logger = logging.getLogger("subrip")
 
+    def run(value: str) -> dict:
+        start = time.perf_counter()
+        entry = {"input": value, "media_id": None}
+        try:
+            entry["media_id"] = parse_media_id(value)
+            logger.info(f"Starting subrip for media id: {entry['media_id']}")
+            statuses = subrip_media(looke=looke, media_id=entry["media_id"], **options)
+            entry["subtitles"] = len(statuses)
+            entry["failed"] = statuses.count(False)
+            entry["status"] = "ok" if all(statuses) else "error"
+            if not all(statuses):
+                entry["error"] = "Subtitle download or conversion failed."
+        except Exception as e:
+            logger.error(f"subrip failed for '{value}': {e}")
+            entry["status"] = "error"
+            entry["error"] = f"{type(e).__name__}: {e}"
+        entry["elapsed"] = round(time.perf_counter() - start, 3)
+        return entry
+
+    values = (line.strip() for line in lines)
+    values = (value for value in values if value and not value.startswith("#"))
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        pending = deque()
+        for value in values:
+            pending.append(executor.submit(run, value))
+            if len(pending) >= jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
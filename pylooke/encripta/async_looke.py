@@ -0,0 +1,371 @@
+import asyncio
+import random
+
+from functools import cached_property
+from typing import TYPE_CHECKING, Iterable, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from pylooke.encripta.looke import Looke, URLS
+from pylooke.utils import body, decoder, device
+from pylooke.utils.cache import make_key
+from pylooke.utils.policy import IDEMPOTENT_METHODS, RetryPolicy
+from pylooke.utils.singleflight import AsyncSingleFlight
+from pylooke.utils.transport import DEFAULT_HEADERS
+
+if TYPE_CHECKING:
+    from pylooke.encripta.encripta_crypto import EncriptaCrypto
+
+def _timeout(timeout: Union[float, Tuple[float, float], None]) -> "httpx.Timeout":
+    # RetryPolicy timeouts are requests-style: one value, or (connect, read).
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect)
+    return httpx.Timeout(timeout)
+
+class AsyncLooke:
+    """
+    Asynchronous counterpart of Looke built on httpx, for keeping many requests in flight from one event loop.
+    """
+    Exceptions = Looke.Exceptions
+
+    def __init__(
+        self,
+        authentication_ticket: str = "looke@looke:v7c8ad@#$",
+        max_connections: int = 100,
+        max_per_host: int = 20,
+        http2: bool = False,
+        client: Optional["httpx.AsyncClient"] = None,
+        urls: Optional[dict] = None,
+        coalesce: bool = True,
+        policy: Optional[RetryPolicy] = None
+    ):
+        """
+        Initializes the AsyncLooke class with a shared connection pool and per-host concurrency limits.
+
+        :param authentication_ticket: Authentication ticket required for API access.
+        :param max_connections: Maximum number of pooled connections across all hosts.
+        :param max_per_host: Maximum number of requests in flight to a single host.
+        :param http2: Negotiate HTTP/2 when the server supports it (requires the h2 package).
+        :param client: Optional pre-built httpx.AsyncClient, e.g. one pointed at a local stand-in server.
+        :param urls: Optional overrides for the service URLs.
+        :param coalesce: Share one findmedia call between coroutines requesting the same media at the same time.
+        :param policy: Timeouts, retries and backoff, the same default RetryPolicy as the sync Transport if omitted.
+        """
+        if httpx is None and client is None:
+            raise ImportError("AsyncLooke requires httpx, install it with: pip install pylooke[async]")
+
+        self.authentication_ticket = authentication_ticket
+        self.policy = policy or RetryPolicy()
+        self.client = client or httpx.AsyncClient(
+            headers=DEFAULT_HEADERS,
+            http2=http2,
+            timeout=_timeout(self.policy.timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            )
+        )
+        self.max_per_host = max_per_host
+        self.semaphores = {}
+        self.urls = {**URLS, **(urls or {})}
+        self.single_flight = AsyncSingleFlight() if coalesce else None
+
+    @cached_property
+    def encripta_crypto(self) -> "EncriptaCrypto":
+        """
+        Crypto used by get_license, built on first use since deriving its key is not free.
+        """
+        from pylooke.encripta.encripta_crypto import EncriptaCrypto
+        return EncriptaCrypto()
+
+    async def find_media(self, media_id: int, media_type: int = 31, **kwargs) -> dict:
+        """
+        Sends a POST request to the 'find_media' to retrieve media details by media ID.
+
+        :param media_id: The ID of the media.
+        :param media_type: The type of media to be used in the request.
+        :param kwargs: Additional optional parameters for entities, groups, or options to include in the request,
+            and fields: a profile name ("subtitles", "catalog", "full") or a list of "Group.Property" fields
+            restricting the requested groups (see body.project).
+
+        :return: Media details result.
+        """
+        payload = body.get_find_media(
+            authentication_ticket=self.authentication_ticket,
+            media_id=media_id,
+            media_type=media_type,
+            entities=kwargs.get("entities"),
+            groups=kwargs.get("groups"),
+            options=kwargs.get("options"),
+            fields=kwargs.get("fields")
+        )
+
+        async def fetch() -> dict:
+            response = await self.send_request(
+                method="POST",
+                url="{host}/{path}".format(
+                    host=self.urls["service_media"],
+                    path="v1/android/findmedia"
+                ),
+                json=payload,
+                idempotent=True
+            )
+
+            data = decoder.decode(response)
+            result = data["FindMediaResult"].get("Movies", [])
+
+            if result:
+                return result[0]
+
+            raise AsyncLooke.Exceptions.FindMediaError(data)
+
+        if self.single_flight:
+            return await self.single_flight.do(("findmedia", make_key(media_id, media_type, payload)), fetch)
+
+        return await fetch()
+
+    async def find_medias(
+        self,
+        media_ids: Iterable[int],
+        media_type: int = 31,
+        return_exceptions: bool = False,
+        **kwargs
+    ) -> list:
+        """
+        Retrieves media details for many media IDs concurrently, bounded by the per-host limit.
+
+        :param media_ids: The IDs of the media.
+        :param media_type: The type of media to be used in the requests.
+        :param return_exceptions: Return exceptions in place of results instead of raising the first one.
+        :param kwargs: Additional optional parameters forwarded to find_media.
+
+        :return: Media details results, in the same order as media_ids.
+        """
+        return await asyncio.gather(
+            *(self.find_media(media_id, media_type, **kwargs) for media_id in media_ids),
+            return_exceptions=return_exceptions
+        )
+
+    async def login_essentials(self, username: str, password: str) -> dict:
+        """
+        Authenticates the user and registers the machine ID for login access.
+
+        :param username: The username of the user to authenticate.
+        :param password: The password associated with the username.
+
+        :return: Login essentials, including the user details and the registered machine ID.
+        """
+        response_login_essentials = await self.send_request(
+            method="POST",
+            url="{host}/{path}".format(
+                host=self.urls["service"],
+                path="v1/android/LoginEssentials"
+            ),
+            json={
+                "AuthenticationTicket": self.authentication_ticket,
+                "Password": password,
+                "Username": username
+            }
+        )
+
+        login_essentials_result = decoder.decode(response_login_essentials)["LoginEssentialsResult"]
+
+        if login_essentials_result.get("Result") != 0:
+            raise AsyncLooke.Exceptions.LoginEssentialsError(login_essentials_result["Message"])
+
+        machine_id = "".join(random.choices("0123456789abcdef", k=16))
+
+        response_join_domain = await self.send_request(
+            method="POST",
+            url="{host}/{path}".format(
+                host=self.urls["service"],
+                path="v1/android/JoinDomain"
+            ),
+            json={
+                "Alias": "Android Device",
+                "AuthenticationTicket": self.authentication_ticket,
+                "MachineId": machine_id,
+                "UserId": login_essentials_result["User"]["UserId"]
+            }
+        )
+
+        join_domain_result = decoder.decode(response_join_domain)["JoinDomainResult"]
+
+        if join_domain_result.get("Message") != "Success":
+            raise AsyncLooke.Exceptions.JoinDomainError(join_domain_result["Message"])
+
+        login_essentials_result["MachineId"] = machine_id
+
+        return login_essentials_result
+
+    async def entitle(self, media_id: int, encrypted_user_id: bytes, transaction_source: int = 3) -> dict:
+        """
+        Sends a POST request to the 'Entitle' to authorize access to the specified media for a user.
+
+        :param media_id: The ID of the media to be entitled.
+        :param encrypted_user_id: The encrypted user ID as bytes.
+        :param transaction_source: The source of the transaction.
+
+        :return: Entitlement result.
+        """
+        response = await self.send_request(
+            method="POST",
+            url="{host}/{path}".format(
+                host=self.urls["service_media"],
+                path="v1/android/Entitle"
+            ),
+            json={
+                "AuthenticationTicket": self.authentication_ticket,
+                "EncUserID": encrypted_user_id.hex().upper(),
+                "MediaID": media_id,
+                "TransactionSource": transaction_source
+            }
+        )
+
+        return decoder.decode(response)["EntitleResult"]
+
+    async def get_concurrent(self, media_id: int, user_id: int) -> dict:
+        """
+        Sends a POST request to the 'GetConcurrent' to check concurrent access
+        for the specified media and user.
+
+        :param media_id: The ID of the media to check.
+        :param user_id: The ID of the user to verify concurrent access.
+
+        :return: Get Concurrent result.
+        """
+        response = await self.send_request(
+            method="POST",
+            url="{host}/{path}".format(
+                host=self.urls["service_media"],
+                path="v1/android/GetConcurrent"
+            ),
+            json={
+                "AuthenticationTicket": self.authentication_ticket,
+                "MediaId": media_id,
+                "UserId": user_id
+            }
+        )
+
+        return decoder.decode(response)["GetConcurrentResult"]
+
+    async def get_license(self, challenge: bytes, media_id: int, user_id: int, machine_id: str) -> bytes:
+        """
+        Get License.
+
+        :param challenge: EME license request.
+        :param media_id: The ID of the media.
+        :param user_id: The ID of the user.
+        :param machine_id: The ID of the machine.
+
+        :return: EME license response.
+        """
+        encrypted_user_id = self.encripta_crypto.encrypt(
+            data=str(user_id)
+        )
+
+        encrypted_device_id = self.encripta_crypto.encrypt(
+            data=device.identifier_with_time(
+                machine_id=machine_id
+            )
+        )
+
+        entitle_result = await self.entitle(
+            media_id=media_id,
+            encrypted_user_id=encrypted_user_id
+        )
+
+        if entitle_result["Result"] != 0:
+            raise AsyncLooke.Exceptions.EntitleError(entitle_result)
+
+        get_concurrent_result = await self.get_concurrent(
+            media_id=media_id,
+            user_id=user_id
+        )
+
+        if get_concurrent_result["Result"] != 0:
+            raise AsyncLooke.Exceptions.GetConcurrentError(get_concurrent_result)
+
+        response = await self.send_request(
+            method="POST",
+            url=self.urls["license"],
+            params={
+                "userId": encrypted_user_id.hex().upper(),
+                "deviceId": encrypted_device_id.hex().upper()
+            },
+            headers={
+                "Content-Type": "application/octet-stream",
+                "User-Agent": "Android Device"
+            },
+            data=challenge
+        )
+
+        if response.status_code == 200:
+            return response.content
+
+        raise AsyncLooke.Exceptions.LicenseError(response.text)
+
+    async def send_request(self, **kwargs) -> "httpx.Response":
+        """
+        Sends an HTTP request with the provided parameters, waiting for a free slot on the target host.
+        Timeouts, retries and backoff follow the policy like the sync Transport: only idempotent requests
+        (GET/HEAD/OPTIONS, or any request sent with idempotent=True) are retried, and the slot is
+        released while waiting for the next attempt.
+
+        :param kwargs: Keyword arguments containing method, URL, headers, and data for the request,
+            plus optional timeout and idempotent.
+
+        :return: Response object from the HTTP request.
+        """
+        host = urlsplit(kwargs["url"]).hostname or ""
+        semaphore = self.semaphores.get(host)
+        if semaphore is None:
+            semaphore = self.semaphores[host] = asyncio.Semaphore(self.max_per_host)
+
+        retryable = kwargs.get("idempotent", kwargs["method"].upper() in IDEMPOTENT_METHODS)
+        timeout = _timeout(kwargs.get("timeout", self.policy.timeout))
+        attempt = 0
+
+        while True:
+            try:
+                async with semaphore:
+                    response = await self.client.request(
+                        method=kwargs["method"],
+                        url=kwargs["url"],
+                        headers=kwargs.get("headers", {}),
+                        params=kwargs.get("params", {}),
+                        json=kwargs.get("json", None),
+                        content=kwargs.get("data", None),
+                        timeout=timeout
+                    )
+            except httpx.TransportError:
+                if not retryable or attempt >= self.policy.retries:
+                    raise
+                delay = self.policy.delay(attempt)
+            else:
+                if not retryable or attempt >= self.policy.retries or \
+                        response.status_code not in self.policy.retry_statuses:
+                    return response
+
+                delay = self.policy.delay(attempt, response.headers.get("Retry-After"))
+                await response.aclose()
+
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def close(self) -> None:
+        """
+        Closes the pooled connections held by the client.
+        """
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
@@ -1,27 +1,121 @@
+import time
 import random
+import logging
+import threading
 
-from requests import request, Response
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, update_wrapper
+from typing import TYPE_CHECKING, Iterator, List, Optional
 
-from pylooke.encripta.encripta_crypto import EncriptaCrypto
-from pylooke.utils import body, device
+from pylooke.utils import body, decoder, device, tracing
+from pylooke.utils.cache import MediaCache, make_key
+from pylooke.utils.singleflight import SingleFlight
+from pylooke.utils.tracing import Hook
+
+if TYPE_CHECKING:
+    from requests import Response
+
+    from pylooke.encripta.encripta_crypto import EncriptaCrypto
+    from pylooke.utils.transport import Transport
+
+URLS = {
+    "service": "https://looke-service.delightfulwave-5cfdd77b.brazilsouth.azurecontainerapps.io",
+    "service_media": "https://looke-service-media.delightfulwave-5cfdd77b.brazilsouth.azurecontainerapps.io",
+    "license": "https://license.ottvs.com.br/Widevine/API/LicenseProxy"
+}
+
+_default_transport: Optional["Transport"] = None
+_default_transport_lock = threading.Lock()
+
+def default_transport() -> "Transport":
+    """
+    Pooled keep-alive transport shared by the requests sent without a client, built on first use.
+    """
+    global _default_transport
+    with _default_transport_lock:
+        if _default_transport is None:
+            from pylooke.utils.transport import Transport
+            _default_transport = Transport()
+        return _default_transport
+
+def send_request(*, transport: Optional["Transport"] = None, **kwargs) -> "Response":
+    """
+    Sends an HTTP request with the provided parameters through transport, or through default_transport.
+
+    :param transport: Transport to send the request through.
+    :param kwargs: Keyword arguments containing method, URL, headers, and data for the request,
+        plus optional timeout, stream (do not read the body yet) and idempotent (allow retries of a non-GET request).
+
+    :return: Response object from the HTTP request.
+    """
+    return (transport or default_transport()).request(**kwargs)
+
+class _ClientMethod:
+    """
+    Decorates a method of a client that can still be called on the class, as when it was a staticmethod:
+    Looke.send_request(...) calls the module-level send_request, looke.send_request(...) the client's own.
+    """
+    def __init__(self, static):
+        self.static = static
+        self.method = None
+
+    def __call__(self, method) -> "_ClientMethod":
+        update_wrapper(self, method)
+        self.method = method
+        return self
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self.static
+        return self.method.__get__(instance, owner)
 
 class Looke:
     """
     Looke class for interacting with the Looke API to retrieve media details, handle entitlements, and acquire licenses.
     """
-    def __init__(self, authentication_ticket: str = "looke@looke:v7c8ad@#$"):
+    def __init__(
+        self,
+        authentication_ticket: str = "looke@looke:v7c8ad@#$",
+        transport: Optional["Transport"] = None,
+        urls: Optional[dict] = None,
+        cache: Optional[MediaCache] = None,
+        hooks: Optional[List[Hook]] = None,
+        coalesce: bool = True
+    ):
         """
         Initializes the Looke class with authentication ticket and required URLs.
+        The crypto and the HTTP stack are only loaded when a request first needs them.
 
         :param authentication_ticket: Authentication ticket required for API access.
+        :param transport: HTTP transport used for every request. A pooled keep-alive Transport is created if omitted.
+        :param urls: Optional overrides for the service URLs, e.g. to point the client at a local stand-in server.
+        :param cache: Optional find_media response cache.
+        :param hooks: Instrumentation hooks called around every request (see pylooke.utils.tracing).
+        :param coalesce: Share one findmedia call between threads requesting the same media at the same time.
         """
         self.authentication_ticket = authentication_ticket
-        self.encripta_crypto = EncriptaCrypto()
-        self.urls = {
-            "service": "https://looke-service.delightfulwave-5cfdd77b.brazilsouth.azurecontainerapps.io",
-            "service_media": "https://looke-service-media.delightfulwave-5cfdd77b.brazilsouth.azurecontainerapps.io",
-            "license": "https://license.ottvs.com.br/Widevine/API/LicenseProxy"
-        }
+        if transport:
+            self.transport = transport
+        self.urls = {**URLS, **(urls or {})}
+        self.cache = cache
+        self.hooks = list(hooks or [])
+        self.single_flight = SingleFlight() if coalesce else None
+
+    @cached_property
+    def encripta_crypto(self) -> "EncriptaCrypto":
+        """
+        Crypto used by get_license, built on first use since deriving its key is not free.
+        """
+        from pylooke.encripta.encripta_crypto import EncriptaCrypto
+        return EncriptaCrypto()
+
+    @cached_property
+    def transport(self) -> "Transport":
+        """
+        Pooled keep-alive transport, built on first use unless one was given.
+        """
+        from pylooke.utils.transport import Transport
+        return Transport()
 
     def find_media(self, media_id: int, media_type: int = 31, **kwargs) -> dict:
         """
@@ -29,34 +123,146 @@ class Looke:
 
         :param media_id: The ID of the media.
         :param media_type: The type of media to be used in the request.
-        :param kwargs: Additional optional parameters for entities, groups, or options to include in the request.
+        :param kwargs: Additional optional parameters for entities, groups, or options to include in the request,
+            and fields: a profile name ("subtitles", "catalog", "full") or a list of "Group.Property" fields
+            restricting the requested groups (see body.project).
 
         :return: Media details result.
         """
-        response = self.send_request(
-            method="POST",
-            url="{host}/{path}".format(
-                host=self.urls["service_media"],
-                path="v1/android/findmedia"
-            ),
-            json={
-                "AuthenticationTicket": self.authentication_ticket,
-                "Criteria": {
-                    "MediaId": media_id,
-                    "MediaType": media_type
-                },
-                "Entities": body.get_entities(kwargs.get("entities")),
-                "Groups": body.get_groups(kwargs.get("groups")),
-                "Options": body.get_options(kwargs.get("options"))
-            }
+        payload = body.get_find_media(
+            authentication_ticket=self.authentication_ticket,
+            media_id=media_id,
+            media_type=media_type,
+            entities=kwargs.get("entities"),
+            groups=kwargs.get("groups"),
+            options=kwargs.get("options"),
+            fields=kwargs.get("fields")
         )
 
-        result = response.json()["FindMediaResult"].get("Movies", [])
+        key = None
+        if self.cache or self.single_flight:
+            key = make_key(media_id, media_type, payload)
+
+        if self.cache:
+            cached = self.cache.get(key)
+            tracing.call(self.hooks, "cache_lookup", "findmedia", cached is not None)
+            if cached is not None:
+                return cached
+
+        def fetch() -> dict:
+            response = self.send_request(
+                method="POST",
+                url="{host}/{path}".format(
+                    host=self.urls["service_media"],
+                    path="v1/android/findmedia"
+                ),
+                json=payload,
+                idempotent=True
+            )
+
+            data = decoder.decode(response)
+            result = data["FindMediaResult"].get("Movies", [])
+
+            if not result:
+                raise Looke.Exceptions.FindMediaError(data)
 
-        if result:
+            if self.cache:
+                self.cache.set(key, result[0])
             return result[0]
 
-        raise Looke.Exceptions.FindMediaError(response.json())
+        if self.single_flight:
+            return self.single_flight.do(("findmedia", key), fetch)
+
+        return fetch()
+
+    def iter_children(
+        self,
+        media_id: int,
+        page_size: int = 50,
+        prefetch: bool = True,
+        media_type: int = 31,
+        max_pages: Optional[int] = 1000,
+        **kwargs
+    ) -> Iterator[dict]:
+        """
+        Lazily iterates over the 'Childs' of a media (seasons of a series, episodes of a season), page by page.
+
+        Paging stops at the first short page, and also when a page brings no child not seen before
+        (an API ignoring the page number or repeating the last full page) or after max_pages pages.
+
+        :param media_id: The ID of the parent media.
+        :param page_size: Number of children requested per page.
+        :param prefetch: Request the next page in the background while the current one is consumed.
+        :param media_type: The type of media to be used in the request.
+        :param max_pages: Maximum number of pages requested, None for no limit.
+        :param kwargs: Additional optional parameters for entities, groups, options or fields (see find_media).
+
+        :return: Children in server order, each one once.
+        """
+        seen = set()
+
+        def fetch_page(page_number: int) -> list:
+            options = {
+                **(kwargs.get("options") or {}),
+                "PageNumber": page_number,
+                "RecordsPerPage": page_size
+            }
+            return self.find_media(
+                media_id=media_id,
+                media_type=media_type,
+                entities=kwargs.get("entities"),
+                groups=kwargs.get("groups"),
+                options=options,
+                fields=kwargs.get("fields")
+            ).get("Childs") or []
+
+        def fresh(childs: list) -> list:
+            new = []
+            for child in childs:
+                key = child.get("Id", id(child))
+                if key not in seen:
+                    seen.add(key)
+                    new.append(child)
+            return new
+
+        def has_next(page_number: int, childs: list, new: list) -> bool:
+            if len(childs) < page_size:
+                return False
+            if not new:
+                logging.getLogger("looke").warning(
+                    f"Page {page_number} of the children of {media_id} repeats earlier ones, stopping."
+                )
+                return False
+            if max_pages and page_number + 1 >= max_pages:
+                logging.getLogger("looke").warning(f"Stopped after {max_pages} pages of children of {media_id}.")
+                return False
+            return True
+
+        if not prefetch:
+            page_number = 0
+            while True:
+                childs = fetch_page(page_number)
+                new = fresh(childs)
+                yield from new
+                if not has_next(page_number, childs, new):
+                    return
+                page_number += 1
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            page_number = 0
+            childs = fetch_page(page_number)
+            while True:
+                new = fresh(childs)
+                following = None
+                if has_next(page_number, childs, new):
+                    following = executor.submit(fetch_page, page_number + 1)
+
+                yield from new
+
+                if following is None:
+                    return
+                childs = following.result()
+                page_number += 1
 
     def login_essentials(self, username: str, password: str) -> dict:
         """
@@ -84,7 +290,7 @@ class Looke:
             }
         )
 
-        login_essentials_result = response_login_essentials.json()["LoginEssentialsResult"]
+        login_essentials_result = decoder.decode(response_login_essentials)["LoginEssentialsResult"]
 
         if login_essentials_result.get("Result") != 0:
             raise Looke.Exceptions.LoginEssentialsError(login_essentials_result["Message"])
@@ -105,7 +311,7 @@ class Looke:
             }
         )
 
-        join_domain_result = response_join_domain.json()["JoinDomainResult"]
+        join_domain_result = decoder.decode(response_join_domain)["JoinDomainResult"]
 
         if join_domain_result.get("Message") != "Success":
             raise Looke.Exceptions.JoinDomainError(join_domain_result["Message"])
@@ -138,7 +344,7 @@ class Looke:
             }
         )
 
-        return response.json()["EntitleResult"]
+        return decoder.decode(response)["EntitleResult"]
 
     def get_concurrent(self, media_id: int, user_id: int) -> dict:
         """
@@ -163,7 +369,7 @@ class Looke:
             }
         )
 
-        return response.json()["GetConcurrentResult"]
+        return decoder.decode(response)["GetConcurrentResult"]
 
     def get_license(self, challenge: bytes, media_id: int, user_id: int, machine_id: str) -> bytes:
         """
@@ -221,31 +427,54 @@ class Looke:
 
         raise Looke.Exceptions.LicenseError(response.text)
 
-    @staticmethod
-    def send_request(**kwargs) -> Response:
+    @_ClientMethod(send_request)
+    def send_request(self, **kwargs) -> "Response":
         """
-        Sends an HTTP request with the provided parameters.
+        Sends an HTTP request with the provided parameters through the client's pooled transport.
+        Called on the class (Looke.send_request(...)), it sends through default_transport instead.
 
-        :param kwargs: Keyword arguments containing method, URL, headers, and data for the request.
+        :param kwargs: Keyword arguments containing method, URL, headers, and data for the request,
+            plus optional timeout, stream (do not read the body yet) and idempotent (allow retries of a non-GET request).
 
         :return: Response object from the HTTP request.
         """
-        headers = {
-            "Accept": "*/*",
-            "User-Agent": "okhttp/4.10.0",
-            **kwargs.get("headers", {})
-        }
-
-        response = request(
-            method=kwargs["method"],
-            url=kwargs["url"],
-            headers=headers,
-            params=kwargs.get("params", {}),
-            json=kwargs.get("json", None),
-            data=kwargs.get("data", None)
-        )
+        if not self.hooks:
+            return send_request(transport=self.transport, **kwargs)
+
+        info = tracing.RequestInfo(method=kwargs["method"], url=kwargs["url"])
+        tracing.call(self.hooks, "before_request", info)
+
+        try:
+            response = send_request(transport=self.transport, **kwargs)
+            info.status = response.status_code
+            info.retries = getattr(response, "retries", 0)
+            info.bytes_sent = len(response.request.body or b"")
+            # A streamed body is not read yet, only its announced length is known.
+            info.bytes_received = int(
+                response.headers.get("Content-Length") or (0 if kwargs.get("stream") else len(response.content))
+            )
+            return response
+        except Exception as e:
+            info.error = tracing.error_name(e)
+            raise
+        finally:
+            info.end = time.perf_counter()
+            tracing.call(self.hooks, "after_request", info)
+
+    def close(self) -> None:
+        """
+        Closes the pooled connections held by the transport and the cache store.
+        """
+        if "transport" in self.__dict__:
+            self.transport.close()
+        if self.cache:
+            self.cache.close()
+
+    def __enter__(self):
+        return self
 
-        return response
+    def __exit__(self, *exc_info):
+        self.close()
 
     class Exceptions:
         class LicenseError(Exception):
@@ -264,4 +493,7 @@ class Looke:
             """Login essentials issues."""
 
         class JoinDomainError(Exception):
-            """Machine registration issues."""
\ No newline at end of file
+            """Machine registration issues."""
+
+        class DownloadError(Exception):
+            """Subtitle download issues."""
\ No newline at end of file
@@ -0,0 +1,294 @@
+import io
+import os
+import time
+import zlib
+import struct
+import tarfile
+import zipfile
+import logging
+import threading
+import warnings
+
+from pathlib import Path
+from typing import Dict, Optional
+
+ARCHIVE_FORMATS = ("zip", "tar")
+ARCHIVE_SCOPES = ("run", "series")
+
+# Seconds between two central directory writes of a zip archive.
+SYNC_INTERVAL = 1.0
+
+_LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+
+class SubtitleArchive:
+    """
+    A zip or tar archive that subtitles are appended to one by one as they are produced.
+
+    Tar members are complete on disk as soon as they are added, so the archive is readable at any
+    time. Zip archives are only readable once their central directory is written, which happens at most
+    every sync_interval seconds while members keep coming, sync_interval seconds after the last one
+    (on a timer) and on close. Either format is reopened for appending on the next run,
+    and a tail left by an interrupted run is repaired first: a torn tar member is cut off, the complete
+    members of a zip without a readable central directory are recovered.
+    """
+    def __init__(self, path: Path, format: str = "zip", sync_interval: float = SYNC_INTERVAL):
+        """
+        Opens the archive for appending, creating it if needed.
+
+        :param path: Archive file.
+        :param format: One of ARCHIVE_FORMATS.
+        :param sync_interval: Seconds between two central directory writes of a zip archive.
+        """
+        if format not in ARCHIVE_FORMATS:
+            raise ValueError(f"Invalid archive format: '{format}'. Expected one of: {', '.join(ARCHIVE_FORMATS)}.")
+
+        self.path = Path(path)
+        self.format = format
+        self.sync_interval = sync_interval
+        self._lock = threading.Lock()
+        self._synced = time.monotonic()
+        self._dirty = False
+        self._timer: Optional[threading.Timer] = None
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists() and self.path.stat().st_size:
+            if format == "zip":
+                _repair_zip(self.path)
+            else:
+                _repair_tar(self.path)
+
+        self._archive = self._open()
+        # Member name -> CRC-32 of its content, when known.
+        self.members: Dict[str, Optional[int]] = (
+            {info.filename: info.CRC for info in self._archive.infolist()} if format == "zip"
+            else dict.fromkeys(self._archive.getnames())
+        )
+
+    def _open(self):
+        if self.format == "zip":
+            return zipfile.ZipFile(self.path, "a", compression=zipfile.ZIP_DEFLATED)
+        return tarfile.open(self.path, "a", format=tarfile.PAX_FORMAT)
+
+    def add(self, name: str, data: bytes) -> None:
+        """
+        Appends a member. A member added again (e.g. a subtitle that changed since the last run)
+        shadows the previous one when extracted, unless its content is the same, then it is skipped.
+
+        :param name: Member name, a relative POSIX path.
+        :param data: Content of the member.
+        """
+        crc = zlib.crc32(data)
+
+        with self._lock:
+            if self.members.get(name) == crc:
+                return
+            if self.format == "zip":
+                info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+                info.compress_type = zipfile.ZIP_DEFLATED
+                info.external_attr = 0o644 << 16
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore", UserWarning)
+                    self._archive.writestr(info, data)
+                self._dirty = True
+                if time.monotonic() - self._synced >= self.sync_interval:
+                    self._sync()
+                elif self._timer is None:
+                    # Writes the central directory once adds stop, so a burst does not leave it unreadable.
+                    self._timer = threading.Timer(self.sync_interval, self._idle_sync)
+                    self._timer.daemon = True
+                    self._timer.start()
+            else:
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                info.mtime = int(time.time())
+                info.mode = 0o644
+                self._archive.addfile(info, io.BytesIO(data))
+                self._archive.fileobj.flush()
+            self.members[name] = crc
+
+    def _sync(self) -> None:
+        # Closing writes the central directory, reopening in append mode overwrites it with the next member.
+        self._archive.close()
+        self._archive = self._open()
+        self._synced = time.monotonic()
+        self._dirty = False
+
+    def _idle_sync(self) -> None:
+        with self._lock:
+            self._timer = None
+            if self._dirty and self._archive:
+                self._sync()
+
+    def __contains__(self, name: str) -> bool:
+        with self._lock:
+            return name in self.members
+
+    def close(self) -> None:
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            if self._archive:
+                self._archive.close()
+                self._archive = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class ArchiveOutput:
+    """
+    Routes the files of a subrip output folder into archives: one for the whole run, or one per series
+    (top-level folder, e.g. 'Series - S01.zip'). Members keep their path relative to the output folder.
+    """
+    def __init__(
+        self,
+        folder: Path,
+        format: str = "zip",
+        scope: str = "run",
+        name: str = "subtitles",
+        sync_interval: float = SYNC_INTERVAL
+    ):
+        """
+        :param folder: Output folder holding the archives.
+        :param format: One of ARCHIVE_FORMATS.
+        :param scope: One of ARCHIVE_SCOPES.
+        :param name: File name, without extension, of the archive of a run.
+        :param sync_interval: See SubtitleArchive.
+        """
+        if scope not in ARCHIVE_SCOPES:
+            raise ValueError(f"Invalid archive scope: '{scope}'. Expected one of: {', '.join(ARCHIVE_SCOPES)}.")
+        if format not in ARCHIVE_FORMATS:
+            raise ValueError(f"Invalid archive format: '{format}'. Expected one of: {', '.join(ARCHIVE_FORMATS)}.")
+
+        self.folder = Path(folder)
+        self.format = format
+        self.scope = scope
+        self.name = name
+        self.sync_interval = sync_interval
+        self.archives: Dict[Path, SubtitleArchive] = {}
+        self._lock = threading.Lock()
+
+    def path(self, member: str) -> Path:
+        """
+        Returns the archive file holding member.
+        """
+        name = self.name if self.scope == "run" else member.split("/", 1)[0]
+        return self.folder / f"{name}.{self.format}"
+
+    def archive(self, member: str) -> SubtitleArchive:
+        path = self.path(member)
+        with self._lock:
+            archive = self.archives.get(path)
+            if archive is None:
+                archive = self.archives[path] = SubtitleArchive(path, self.format, self.sync_interval)
+            return archive
+
+    def add(self, member: str, data: bytes) -> None:
+        self.archive(member).add(member, data)
+        logging.getLogger("subrip").info(f"Saved to: {self.path(member)}:{member}")
+
+    def __contains__(self, member: str) -> bool:
+        path = self.path(member)
+        if path not in self.archives and not path.exists():
+            return False
+        return member in self.archive(member)
+
+    def close(self) -> None:
+        with self._lock:
+            for archive in self.archives.values():
+                archive.close()
+            self.archives.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def _repair_tar(path: Path) -> None:
+    """
+    Cuts off a member torn by an interrupted run, keeping every complete one, and ends the archive.
+    """
+    size = path.stat().st_size
+    end = 0
+
+    try:
+        with tarfile.open(path, "r") as archive:
+            for member in archive:
+                member_end = member.offset_data + -(-member.size // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+                if member_end > size:
+                    break
+                end = member_end
+    except tarfile.ReadError:
+        pass
+
+    with open(path, "r+b") as fp:
+        fp.seek(end)
+        tail = fp.read()
+        # Members are flushed without the end-of-archive blocks, which appending needs.
+        if tail.strip(b"\0") or len(tail) < 2 * tarfile.BLOCKSIZE:
+            if tail.strip(b"\0"):
+                logging.getLogger("subrip").warning(f"Truncated an incomplete member at the end of {path}")
+            fp.seek(end)
+            fp.truncate()
+            fp.write(b"\0" * 2 * tarfile.BLOCKSIZE)
+
+def _repair_zip(path: Path) -> None:
+    """
+    Rebuilds a zip whose central directory was not written, from the complete members found in order.
+
+    A run interrupted after appending a member over the central directory of the previous one can leave
+    the old end record in place: the file still looks like a zip, but its central directory is gone.
+    Opening it, not only finding the end record, tells the two apart.
+    """
+    try:
+        with zipfile.ZipFile(path):
+            return
+    except zipfile.BadZipFile:
+        pass
+
+    logger = logging.getLogger("subrip")
+    logger.warning(f"{path} was not closed, recovering its complete members")
+
+    members = []
+    with open(path, "rb") as fp:
+        while True:
+            header = fp.read(_LOCAL_HEADER.size)
+            if len(header) < _LOCAL_HEADER.size:
+                break
+            signature, _, flags, method, mtime, mdate, crc, csize, _, name_size, extra_size = _LOCAL_HEADER.unpack(header)
+            if signature != b"PK\x03\x04" or flags & 0x08 or method not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+                break
+            name = fp.read(name_size).decode("utf-8" if flags & 0x800 else "cp437")
+            fp.seek(extra_size, os.SEEK_CUR)
+            data = fp.read(csize)
+            if len(data) < csize:
+                break
+            try:
+                if method == zipfile.ZIP_DEFLATED:
+                    data = zlib.decompress(data, -zlib.MAX_WBITS)
+            except zlib.error:
+                break
+            if zlib.crc32(data) != crc:
+                break
+            date_time = (
+                (mdate >> 9) + 1980, (mdate >> 5) & 0xF, mdate & 0x1F,
+                mtime >> 11, (mtime >> 5) & 0x3F, (mtime & 0x1F) * 2
+            )
+            members.append((name, date_time, data))
+
+    temporary = path.with_name(f".{path.name}.repair")
+    with zipfile.ZipFile(temporary, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, date_time, data in members:
+            info = zipfile.ZipInfo(name, date_time=date_time)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", UserWarning)
+                archive.writestr(info, data)
+    os.replace(temporary, path)
+
+    logger.info(f"Recovered {len(members)} members of {path}")
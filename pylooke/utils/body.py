@@ -1,39 +1,81 @@
-from typing import Optional
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+GROUPS: Dict[str, Tuple[str, ...]] = {
+    "SerieInfo": ("EpisodeName", "Position", "SeasonName"),
+    "Metadata": (
+        "Actors", "AverageRating", "Censure", "Country", "Description",
+        "Directors", "Distributor", "Genres", "IsCinema", "PreOrderDate",
+        "Synopsis", "TrailerUrl", "UniqueUrl", "Year"
+    ),
+    "FileInfo": (
+        "Audios", "CreditStartsAt", "Definition", "DubbedInfo", "Duration",
+        "RestrictDownloadBrazil", "RestrictDownloadBuy",
+        "RestrictDownloadRent", "RestrictDownloadSVOD", "Subtitles"
+    ),
+    "Smooth": ("TimeFrameDistance", "TimeFrameUrl", "UrlDashStreaming"),
+    "Images": ("TypeId", "Url"),
+    "Price": ("FreePrice", "PreOrder", "PurchasePrice", "RentPrice", "SVODPrice")
+}
+
+ENTITIES: Dict[str, Tuple[str, ...]] = {
+    "Subtitles": ("UrlVTT", "UrlTTM", "UrlSRT", "Name", "Code")
+}
+
+# Id, ParentId, FullTitle and Childs are always returned, profiles only list groups and entities.
+PROFILES: Dict[str, Optional[Tuple[str, ...]]] = {
+    "subtitles": ("SerieInfo.Position", "Metadata.Year", "FileInfo.Subtitles"),
+    "catalog": ("SerieInfo", "Metadata.Year", "FileInfo.Subtitles"),
+    "full": None
+}
+
+Fields = Union[str, Iterable[str], None]
+
+def project(fields: Fields) -> Optional[Dict[str, List[str]]]:
+    """
+    Resolves a profile name or a list of "Group.Property" / "Group" / "Entity.Property" fields
+    into the properties to request per group and entity.
+
+    :param fields: Profile name (see PROFILES), fields, or None for everything.
+
+    :return: Properties per group and entity name in request order, or None for everything.
+    """
+    if isinstance(fields, str):
+        if fields not in PROFILES:
+            raise ValueError(f"Unknown field profile: '{fields}'. Expected one of: {', '.join(PROFILES)}.")
+        fields = PROFILES[fields]
+
+    if fields is None:
+        return None
+
+    selected = {}
+    for field in fields:
+        name, _, prop = field.partition(".")
+        known = GROUPS.get(name) or ENTITIES.get(name)
+        if known is None or (prop and prop not in known):
+            raise ValueError(f"Unknown field: '{field}'.")
+        selected.setdefault(name, set()).update([prop] if prop else known)
+
+    # Subtitle properties are an entity nested in FileInfo.Subtitles, each one needs the other.
+    if "Subtitles" in selected.get("FileInfo", ()):
+        selected.setdefault("Subtitles", set(ENTITIES["Subtitles"]))
+    elif "Subtitles" in selected:
+        selected.setdefault("FileInfo", set()).add("Subtitles")
+
+    return {
+        name: [prop for prop in known if prop in selected[name]]
+        for name, known in {**GROUPS, **ENTITIES}.items() if name in selected
+    }
+
+def get_groups(extras: Optional[dict] = None, fields: Fields = None) -> list:
+    projection = project(fields)
 
-def get_groups(extras: Optional[dict] = None) -> list:
     groups = [
         {
-            "GroupName": "SerieInfo",
-            "GroupProperties": "EpisodeName|Position|SeasonName"
-        },
-        {
-            "GroupName": "Metadata",
-            "GroupProperties": (
-                "Actors|AverageRating|Censure|Country|Description|"
-                "Directors|Distributor|Genres|IsCinema|PreOrderDate|"
-                "Synopsis|TrailerUrl|UniqueUrl|Year"
-            )
-        },
-        {
-            "GroupName": "FileInfo",
-            "GroupProperties": (
-                "Audios|CreditStartsAt|Definition|DubbedInfo|Duration|"
-                "RestrictDownloadBrazil|RestrictDownloadBuy|"
-                "RestrictDownloadRent|RestrictDownloadSVOD|Subtitles"
-            )
-        },
-        {
-            "GroupName": "Smooth",
-            "GroupProperties": "TimeFrameDistance|TimeFrameUrl|UrlDashStreaming"
-        },
-        {
-            "GroupName": "Images",
-            "GroupProperties": "TypeId|Url"
-        },
-        {
-            "GroupName": "Price",
-            "GroupProperties": "FreePrice|PreOrder|PurchasePrice|RentPrice|SVODPrice"
+            "GroupName": name,
+            "GroupProperties": "|".join(properties if projection is None else projection[name])
         }
+        for name, properties in GROUPS.items()
+        if projection is None or name in projection
     ]
 
     if extras:
@@ -41,12 +83,16 @@ def get_groups(extras: Optional[dict] = None) -> list:
 
     return groups
 
-def get_entities(extras: Optional[dict] = None) -> list:
+def get_entities(extras: Optional[dict] = None, fields: Fields = None) -> list:
+    projection = project(fields)
+
     entities = [
         {
-            "EntityName": "Subtitles",
-            "EntityProperties": "UrlVTT|UrlTTM|UrlSRT|Name|Code"
+            "EntityName": name,
+            "EntityProperties": "|".join(properties if projection is None else projection[name])
         }
+        for name, properties in ENTITIES.items()
+        if projection is None or name in projection
     ]
 
     if extras:
@@ -75,4 +121,24 @@ def get_options(extras: Optional[dict] = None) -> dict:
     if extras:
         options.update(extras)
 
-    return options
\ No newline at end of file
+    return options
+
+def get_find_media(
+    authentication_ticket: str,
+    media_id: int,
+    media_type: int = 31,
+    entities: Optional[dict] = None,
+    groups: Optional[dict] = None,
+    options: Optional[dict] = None,
+    fields: Fields = None
+) -> dict:
+    return {
+        "AuthenticationTicket": authentication_ticket,
+        "Criteria": {
+            "MediaId": media_id,
+            "MediaType": media_type
+        },
+        "Entities": get_entities(entities, fields),
+        "Groups": get_groups(groups, fields),
+        "Options": get_options(options)
+    }
@@ -0,0 +1,165 @@
+import json
+import threading
+import time
+import hashlib
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from pylooke.utils import decoder
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "pylooke"
+
+def make_key(media_id: int, media_type: int, payload: dict) -> str:
+    """
+    Builds a stable cache key from the media ID, media type and the normalized
+    Entities/Groups/Options of a findmedia payload.
+
+    :param media_id: The ID of the media.
+    :param media_type: The type of media.
+    :param payload: The findmedia request body.
+
+    :return: Hex digest identifying the request.
+    """
+    normalized = json.dumps(
+        [
+            media_id,
+            media_type,
+            payload.get("Entities"),
+            payload.get("Groups"),
+            payload.get("Options")
+        ],
+        sort_keys=True,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+class MediaCache:
+    """
+    Two level find_media response cache: an in-memory LRU in front of an optional SQLite store.
+    """
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        ttl: float = 24 * 60 * 60,
+        max_entries: int = 1024,
+        max_disk_entries: int = 100_000
+    ):
+        """
+        Initializes the cache.
+
+        :param path: Folder holding the SQLite store. Only the in-memory LRU is used if omitted.
+        :param ttl: Default time to live of an entry, in seconds.
+        :param max_entries: Maximum number of entries kept in memory.
+        :param max_disk_entries: Maximum number of entries kept on disk, least recently used are evicted first.
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+
+        if path:
+            import sqlite3
+
+            path = Path(path)
+            path.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path / "find_media.sqlite3"), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, expires REAL NOT NULL, accessed REAL NOT NULL, value TEXT NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        Returns the cached value for key, or None when it is missing or expired.
+        """
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and entry[0] > now:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry:
+                del self._memory[key]
+
+            if self._db:
+                row = self._db.execute(
+                    "SELECT expires, value FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                if row and row[0] > now:
+                    self._db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+                    self._db.commit()
+                    value = decoder.loads(row[1])
+                    self._remember(key, row[0], value)
+                    self.hits += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: dict, ttl: Optional[float] = None) -> None:
+        """
+        Stores value under key for ttl seconds, or the cache default.
+        """
+        now = time.time()
+        expires = now + (self.ttl if ttl is None else ttl)
+
+        with self._lock:
+            self._remember(key, expires, value)
+
+            if self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO entries (key, expires, accessed, value) VALUES (?, ?, ?, ?)",
+                    (key, expires, now, json.dumps(value, separators=(",", ":")))
+                )
+                count = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+                if count > self.max_disk_entries:
+                    overflow = count - self.max_disk_entries
+                    self._db.execute(
+                        "DELETE FROM entries WHERE key IN "
+                        "(SELECT key FROM entries ORDER BY accessed ASC LIMIT ?)",
+                        (overflow,)
+                    )
+                    self.evictions += overflow
+                self._db.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db:
+                self._db.execute("DELETE FROM entries")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory)
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db:
+                self._db.close()
+                self._db = None
+
+    def _remember(self, key: str, expires: float, value: dict) -> None:
+        self._memory[key] = (expires, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            if not self._db:
+                self.evictions += 1
@@ -0,0 +1,76 @@
+import os
+
+from typing import Any, Callable, Optional
+
+# Tried in this order when no backend is chosen, the first one installed is used.
+BACKENDS = ("orjson", "msgspec", "json")
+
+_loads: Optional[Callable[[bytes], Any]] = None
+_backend: Optional[str] = None
+
+def _load_backend(name: str) -> Callable[[bytes], Any]:
+    if name == "orjson":
+        import orjson
+        return orjson.loads
+
+    if name == "msgspec":
+        import msgspec
+
+        decoder = msgspec.json.Decoder()
+
+        def loads(data: bytes) -> Any:
+            try:
+                return decoder.decode(data)
+            except msgspec.DecodeError as e:
+                # Same exception family as the other backends.
+                raise ValueError(str(e)) from e
+
+        return loads
+
+    if name == "json":
+        import json
+        return json.loads
+
+    raise ValueError(f"Unknown JSON backend: '{name}'. Expected one of: {', '.join(BACKENDS)}.")
+
+def set_backend(name: Optional[str] = None) -> str:
+    """
+    Selects the JSON decoder used for every API response.
+
+    :param name: One of BACKENDS, or None for the fastest one installed
+        (or the PYLOOKE_JSON_BACKEND environment variable, if set).
+
+    :return: Name of the selected backend.
+    """
+    global _loads, _backend
+
+    name = name or os.environ.get("PYLOOKE_JSON_BACKEND")
+    if name:
+        _loads, _backend = _load_backend(name), name
+        return name
+
+    for candidate in BACKENDS:
+        try:
+            _loads, _backend = _load_backend(candidate), candidate
+            return candidate
+        except ImportError:
+            continue
+
+def backend() -> str:
+    return _backend or set_backend()
+
+def loads(data: bytes) -> Any:
+    """
+    Decodes a JSON document with the selected backend.
+    """
+    if _loads is None:
+        set_backend()
+    return _loads(data)
+
+def decode(response) -> Any:
+    """
+    Decodes the body of a requests or httpx response, in place of response.json().
+
+    :raises ValueError: The body is not valid JSON.
+    """
+    return loads(response.content)
@@ -0,0 +1,156 @@
+import os
+import mmap
+import hashlib
+import tempfile
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, Optional, Tuple, Union
+
+from requests import RequestException
+
+from pylooke.encripta.looke import Looke
+
+if TYPE_CHECKING:
+    from requests import Response
+
+CHUNK_SIZE = 64 * 1024
+MAX_SIZE = 64 * 1024 * 1024
+
+def _temporary(path: Path) -> Tuple[int, str]:
+    # Unlike mkstemp (owner only), created with 0o666 so the kernel applies the umask like for any other file.
+    flags = os.O_RDWR | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+    for _ in range(tempfile.TMP_MAX):
+        temporary = str(path.parent / f".{path.name}.{os.urandom(4).hex()}.part")
+        try:
+            return os.open(temporary, flags, 0o666), temporary
+        except FileExistsError:
+            continue
+    raise FileExistsError(f"No usable temporary name found next to {path}")
+
+def check_status(response: "Response") -> None:
+    """
+    Closes response and raises when its status is not 2xx, so an error page is never saved as the body.
+
+    :raises Looke.Exceptions.DownloadError: The status is not 2xx.
+    """
+    if not 200 <= response.status_code < 300:
+        response.close()
+        raise Looke.Exceptions.DownloadError(f"{response.url} answered HTTP {response.status_code}.")
+
+def staging_file() -> Path:
+    """
+    Creates an empty file in the system temporary folder for a download that is not kept,
+    so the output folder only sees finished files.
+    """
+    fd, temporary = tempfile.mkstemp(prefix="pylooke-", suffix=".download")
+    os.close(fd)
+    return Path(temporary)
+
+def stream_to_file(
+    response: "Response",
+    path: Path,
+    max_size: Optional[int] = MAX_SIZE,
+    chunk_size: int = CHUNK_SIZE
+) -> Tuple[int, str]:
+    """
+    Writes a streamed response body to path chunk by chunk, so memory stays bounded whatever the size.
+
+    The body goes to a temporary file next to path which is renamed over it once complete,
+    so path never holds a partial download.
+
+    :param response: Response of a request sent with stream=True. It is closed on return.
+    :param path: Destination file.
+    :param max_size: Abort downloads larger than this many bytes, None for no limit.
+    :param chunk_size: Bytes read from the connection at a time.
+
+    :raises Looke.Exceptions.DownloadError: The status is not 2xx, the body is over max_size, shorter than
+        its Content-Length, or the connection broke while reading it.
+
+    :return: Size and sha256 hex digest of the body.
+    """
+    check_status(response)
+
+    expected = response.headers.get("Content-Length")
+    # With a Content-Encoding, Content-Length counts the compressed bytes and iter_content yields decoded ones.
+    if not (expected and expected.isdigit()) or response.headers.get("Content-Encoding"):
+        expected = None
+    else:
+        expected = int(expected)
+
+    if max_size and expected and expected > max_size:
+        response.close()
+        raise Looke.Exceptions.DownloadError(
+            f"{response.url} is {expected} bytes, over the limit of {max_size} bytes."
+        )
+
+    path = Path(path)
+    fd, temporary = _temporary(path)
+    sha256 = hashlib.sha256()
+    size = 0
+
+    try:
+        with os.fdopen(fd, "wb") as fp:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                size += len(chunk)
+                if max_size and size > max_size:
+                    raise Looke.Exceptions.DownloadError(
+                        f"{response.url} is over the limit of {max_size} bytes."
+                    )
+                sha256.update(chunk)
+                fp.write(chunk)
+
+        if expected is not None and size != expected:
+            raise Looke.Exceptions.DownloadError(
+                f"{response.url} was truncated: received {size} of {expected} bytes."
+            )
+
+        os.replace(temporary, path)
+    except RequestException as e:
+        os.unlink(temporary)
+        raise Looke.Exceptions.DownloadError(f"{response.url} was interrupted: {e}") from e
+    except BaseException:
+        try:
+            os.unlink(temporary)
+        except FileNotFoundError:
+            pass
+        raise
+    finally:
+        response.close()
+
+    return size, sha256.hexdigest()
+
+def write_file(path: Path, data: bytes) -> None:
+    """
+    Writes data to a temporary file next to path and renames it over path, so path never holds
+    a partial file and a hardlink at path is replaced instead of written through.
+    """
+    path = Path(path)
+    fd, temporary = _temporary(path)
+    try:
+        with os.fdopen(fd, "wb") as fp:
+            fp.write(data)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+@contextmanager
+def map_file(path: Path) -> Iterator[Union[mmap.mmap, bytes]]:
+    """
+    Maps a file read-only, so it can be sniffed and converted without reading it all into the heap.
+    Empty files, which cannot be mapped, give b"".
+    """
+    with open(path, "rb") as fp:
+        if os.fstat(fp.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            yield view
+
+def digest_file(path: Path, chunk_size: int = CHUNK_SIZE) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as fp:
+        for chunk in iter(lambda: fp.read(chunk_size), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
@@ -0,0 +1,273 @@
+import time
+import logging
+import sqlite3
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional
+
+from pylooke.utils import body
+from pylooke.utils.cache import DEFAULT_CACHE_DIR
+from pylooke.utils.models import Media
+
+if TYPE_CHECKING:
+    from pylooke.encripta.looke import Looke
+
+INDEX_NAME = "index.sqlite3"
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS medias ("
+    "id INTEGER PRIMARY KEY, parent_id INTEGER, full_title TEXT, episode_name TEXT, season_name TEXT, "
+    "season INTEGER, position INTEGER, year INTEGER, crawled REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS medias_parent ON medias (parent_id)",
+    # track tells apart several subtitles of one language (e.g. forced and full): their first URL, else their name.
+    "CREATE TABLE IF NOT EXISTS subtitles ("
+    "media_id INTEGER NOT NULL, language TEXT NOT NULL COLLATE NOCASE, name TEXT, "
+    "url_vtt TEXT, url_ttm TEXT, url_srt TEXT, track TEXT NOT NULL, PRIMARY KEY (media_id, language, track))",
+    "CREATE INDEX IF NOT EXISTS subtitles_language ON subtitles (language, media_id)"
+)
+
+DESCENDANTS = (
+    "WITH RECURSIVE tree(id) AS ("
+    "SELECT id FROM medias WHERE parent_id = :media_id "
+    "UNION SELECT medias.id FROM medias JOIN tree ON medias.parent_id = tree.id) "
+)
+
+class CatalogIndex:
+    """
+    Local SQLite index of media trees crawled with find_media, answering catalog lookups
+    (parents, children, episodes with a given subtitle language, subtitle URLs) without network calls.
+    """
+    def __init__(self, path: Optional[Path] = None):
+        """
+        Opens or creates the index.
+
+        :param path: Folder holding the index, defaults to the pylooke cache folder.
+        """
+        path = Path(path or DEFAULT_CACHE_DIR)
+        path.mkdir(parents=True, exist_ok=True)
+
+        self.path = path / INDEX_NAME
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        for statement in SCHEMA:
+            self._db.execute(statement)
+        self._db.commit()
+
+    @staticmethod
+    def _row(media: Media, crawled: float) -> tuple:
+        return (
+            media.id,
+            media.parent_id,
+            media.full_title,
+            media.series_info.episode_name,
+            media.series_info.season_name,
+            media.series_info.season,
+            media.series_info.position,
+            media.year or None,
+            crawled
+        )
+
+    def add(self, medias: List[dict], crawled: Optional[float] = None) -> None:
+        """
+        Inserts or replaces medias and their subtitles.
+
+        :param medias: Media dicts as returned by find_media or found in 'Childs'.
+        :param crawled: Timestamp of the crawl, defaults to now.
+        """
+        crawled = crawled or time.time()
+        medias = [Media.from_dict(media, lazy_groups=False) for media in medias]
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO medias VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [self._row(media, crawled) for media in medias]
+            )
+            for media in medias:
+                self._db.execute("DELETE FROM subtitles WHERE media_id = ?", (media.id,))
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO subtitles VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            media.id, subtitle.code, subtitle.name, subtitle.url_vtt, subtitle.url_ttm, subtitle.url_srt,
+                            subtitle.url_vtt or subtitle.url_ttm or subtitle.url_srt or subtitle.name or ""
+                        )
+                        for subtitle in media.subtitles
+                    ]
+                )
+
+    def _set_children(self, parent_id: int, childs: List[dict], crawled: float) -> None:
+        """
+        Stores the children of a media, dropping the ones missing since the previous crawl.
+        """
+        self.add(childs, crawled)
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM medias WHERE parent_id = ? AND crawled < ?", (parent_id, crawled))
+
+    def crawl(
+        self,
+        looke: "Looke",
+        media_id: int,
+        workers: int = 1,
+        page_size: int = 50,
+        max_age: Optional[float] = None,
+        fields: body.Fields = "catalog"
+    ) -> int:
+        """
+        Indexes the whole tree of a media: its top level parent (series) and every season and episode below it.
+
+        :param looke: Client used for the find_media calls.
+        :param media_id: The ID of any media of the tree.
+        :param workers: Number of medias expanded at the same time.
+        :param page_size: Number of children requested per page.
+        :param max_age: Skip the tree if it was crawled less than this many seconds ago.
+        :param fields: Groups requested from find_media, only the indexed ones by default.
+
+        :return: Number of medias indexed.
+        """
+        logger = logging.getLogger("index")
+
+        if max_age is not None:
+            root = self.get(self.root(media_id))
+            if root and root["crawled"] >= time.time() - max_age:
+                logger.debug(f"Skipping media id {media_id}, indexed with {root['id']}.")
+                return 0
+
+        crawled = time.time()
+        media = looke.find_media(media_id, fields=fields)
+        ancestors = {media["Id"]}
+        while media.get("ParentId") and media["ParentId"] not in ancestors:
+            media = looke.find_media(media["ParentId"], fields=fields)
+            ancestors.add(media["Id"])
+
+        logger.info(f"Indexing {media['FullTitle']} (ID: {media['Id']}).")
+        self.add([media], crawled)
+        count = 1
+        visited = {media["Id"]}
+
+        def expand(parent: dict) -> List[dict]:
+            childs = parent.get("Childs") or []
+            if len(childs) >= page_size:
+                childs = list(looke.iter_children(media_id=parent["Id"], page_size=page_size, fields=fields))
+            self._set_children(parent["Id"], childs, crawled)
+            return childs
+
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+            frontier = [media]
+            while frontier:
+                containers = []
+                for childs in executor.map(expand, frontier):
+                    count += len(childs)
+                    containers += [
+                        child for child in childs
+                        if not (child.get("SerieInfo") or {}).get("Position") and child["Id"] not in visited
+                    ]
+                visited.update(child["Id"] for child in containers)
+                frontier = list(executor.map(lambda child: looke.find_media(child["Id"], fields=fields), containers))
+
+        with self._lock, self._db:
+            while self._db.execute(
+                "DELETE FROM medias WHERE parent_id IS NOT NULL AND parent_id NOT IN (SELECT id FROM medias)"
+            ).rowcount:
+                pass
+            self._db.execute("DELETE FROM subtitles WHERE media_id NOT IN (SELECT id FROM medias)")
+
+        return count
+
+    def refresh(self, looke: "Looke", max_age: Optional[float] = None, workers: int = 1, page_size: int = 50) -> int:
+        """
+        Crawls again every indexed tree older than max_age, or all of them.
+
+        :return: Number of medias indexed.
+        """
+        cutoff = time.time() - max_age if max_age is not None else float("inf")
+        with self._lock:
+            roots = [
+                row["id"] for row in self._db.execute(
+                    "SELECT id FROM medias WHERE parent_id IS NULL AND crawled < ? ORDER BY id", (cutoff,)
+                )
+            ]
+        return sum(self.crawl(looke, root, workers=workers, page_size=page_size) for root in roots)
+
+    def _query(self, sql: str, parameters=()) -> List[dict]:
+        with self._lock:
+            return [dict(row) for row in self._db.execute(sql, parameters)]
+
+    def get(self, media_id: Optional[int]) -> Optional[dict]:
+        rows = self._query("SELECT * FROM medias WHERE id = ?", (media_id,))
+        return rows[0] if rows else None
+
+    def parent(self, media_id: int) -> Optional[dict]:
+        rows = self._query(
+            "SELECT parent.* FROM medias JOIN medias AS parent ON parent.id = medias.parent_id WHERE medias.id = ?",
+            (media_id,)
+        )
+        return rows[0] if rows else None
+
+    def root(self, media_id: int) -> Optional[int]:
+        """
+        ID of the top level parent of an indexed media, or None if it is not indexed.
+        """
+        rows = self._query(
+            "WITH RECURSIVE up(id, parent_id) AS ("
+            "SELECT id, parent_id FROM medias WHERE id = ? "
+            "UNION SELECT medias.id, medias.parent_id FROM medias JOIN up ON medias.id = up.parent_id) "
+            "SELECT id FROM up WHERE parent_id IS NULL OR parent_id NOT IN (SELECT id FROM medias)",
+            (media_id,)
+        )
+        return rows[0]["id"] if rows else None
+
+    def children(self, media_id: int) -> List[dict]:
+        return self._query("SELECT * FROM medias WHERE parent_id = ? ORDER BY season, position, id", (media_id,))
+
+    def episodes(self, media_id: int, language: Optional[str] = None, season: Optional[int] = None) -> List[dict]:
+        """
+        Episodes below a series or season, optionally only the ones with a subtitle in language.
+
+        :param media_id: The ID of the series or season.
+        :param language: Language code the episodes must have a subtitle in.
+        :param season: Season number to keep.
+
+        :return: Episodes ordered by season and position.
+        """
+        sql = DESCENDANTS + "SELECT medias.* FROM medias JOIN tree ON medias.id = tree.id WHERE position IS NOT NULL"
+        parameters = {"media_id": media_id}
+        if season is not None:
+            sql += " AND season = :season"
+            parameters["season"] = season
+        if language:
+            sql += " AND EXISTS (SELECT 1 FROM subtitles WHERE media_id = medias.id AND language = :language)"
+            parameters["language"] = language
+        return self._query(sql + " ORDER BY season, position, id", parameters)
+
+    def subtitles(self, media_id: int, language: Optional[str] = None) -> List[dict]:
+        if language:
+            return self._query(
+                "SELECT * FROM subtitles WHERE media_id = ? AND language = ? ORDER BY rowid", (media_id, language)
+            )
+        return self._query("SELECT * FROM subtitles WHERE media_id = ? ORDER BY language, rowid", (media_id,))
+
+    def search(self, text: str, limit: int = 50) -> List[dict]:
+        return self._query(
+            "SELECT * FROM medias WHERE full_title LIKE ? ORDER BY parent_id IS NOT NULL, id LIMIT ?",
+            (f"%{text}%", limit)
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "medias": self._db.execute("SELECT COUNT(*) FROM medias").fetchone()[0],
+                "roots": self._db.execute("SELECT COUNT(*) FROM medias WHERE parent_id IS NULL").fetchone()[0],
+                "subtitles": self._db.execute("SELECT COUNT(*) FROM subtitles").fetchone()[0]
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,108 @@
+import os
+import json
+import time
+import threading
+
+from pathlib import Path
+from typing import Callable, Optional
+
+MANIFEST_NAME = ".pylooke-manifest.jsonl"
+
+class Manifest:
+    """
+    Record of the subtitles processed into an output folder, used to skip finished work on reruns.
+
+    Entries are keyed by media ID, language and subtitle URL, and hold the content hash, size,
+    HTTP validators (ETag/Last-Modified) and conversion status of the subtitle. Updates are appended
+    to a JSON lines log, so every finished item survives a crash; the log is compacted on close.
+    """
+    def __init__(self, folder: Path, name: str = MANIFEST_NAME, exists: Optional[Callable[[str], bool]] = None):
+        """
+        Loads the manifest of folder, if any.
+
+        :param folder: Output folder the manifest belongs to.
+        :param name: File name of the manifest inside the folder.
+        :param exists: Tells whether a recorded output is still there, e.g. a member of an ArchiveOutput.
+            Defaults to checking for the file in folder.
+        """
+        self.folder = Path(folder)
+        self.path = self.folder / name
+        self.exists = exists or (lambda output: self.resolve(output).exists())
+        self.entries = {}
+        self._lock = threading.Lock()
+        self._updates = 0
+
+        if self.path.exists():
+            with self.path.open("r", encoding="utf-8") as fp:
+                for line in fp:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A torn last line from an interrupted run.
+                        continue
+                    self.entries[entry["key"]] = entry
+
+    @staticmethod
+    def key(media_id: int, language: str, url: str) -> str:
+        return f"{media_id}|{language.lower()}|{url}"
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self.entries.get(key)
+            return dict(entry) if entry else None
+
+    def update(self, key: str, **fields) -> dict:
+        """
+        Merges fields into the entry of key and appends it to the log.
+        """
+        with self._lock:
+            entry = {**self.entries.get(key, {"key": key}), **fields, "updated": time.time()}
+            self.entries[key] = entry
+            self.folder.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as fp:
+                fp.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._updates += 1
+            return dict(entry)
+
+    def relative(self, file: Path) -> str:
+        try:
+            return str(Path(file).relative_to(self.folder))
+        except ValueError:
+            return str(file)
+
+    def resolve(self, name: str) -> Path:
+        return self.folder / name
+
+    def is_finished(self, entry: Optional[dict]) -> bool:
+        """
+        Tells whether the entry was fully processed and its output is still on disk.
+        """
+        return bool(
+            entry
+            and entry.get("status") in ("converted", "saved")
+            and entry.get("output")
+            and self.exists(entry["output"])
+        )
+
+    def compact(self) -> None:
+        """
+        Rewrites the log with only the latest state of every entry.
+        """
+        with self._lock:
+            if not self._updates:
+                return
+            temporary = self.path.with_name(self.path.name + ".tmp")
+            with temporary.open("w", encoding="utf-8") as fp:
+                for entry in self.entries.values():
+                    fp.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            os.replace(temporary, self.path)
+            self._updates = 0
+
+    def close(self) -> None:
+        self.compact()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,176 @@
+import re
+import sys
+import json
+
+from typing import Any, Optional, Tuple
+
+SEASON_PATTERN = re.compile(r"(\d+)ª")
+LAZY_GROUPS = ("Metadata", "FileInfo", "Images", "Price", "Smooth")
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value else value
+
+class Subtitle:
+    """
+    Subtitle track of a media, from FileInfo.Subtitles.
+    """
+    __slots__ = ("code", "name", "url_vtt", "url_ttm", "url_srt")
+
+    def __init__(
+        self,
+        code: str,
+        name: Optional[str] = None,
+        url_vtt: Optional[str] = None,
+        url_ttm: Optional[str] = None,
+        url_srt: Optional[str] = None
+    ):
+        self.code = code
+        self.name = name
+        self.url_vtt = url_vtt
+        self.url_ttm = url_ttm
+        self.url_srt = url_srt
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Subtitle":
+        return cls(
+            code=_intern(data["Code"]),
+            name=_intern(data.get("Name")),
+            url_vtt=data.get("UrlVTT") or None,
+            url_ttm=data.get("UrlTTM") or None,
+            url_srt=data.get("UrlSRT") or None
+        )
+
+    def __repr__(self) -> str:
+        return f"Subtitle(code={self.code!r}, name={self.name!r})"
+
+class SeriesInfo:
+    """
+    Position of an episode in its series, from SerieInfo and the season number of FullTitle.
+    """
+    __slots__ = ("position", "episode_name", "season_name", "season")
+
+    def __init__(
+        self,
+        position: Optional[int] = None,
+        episode_name: Optional[str] = None,
+        season_name: Optional[str] = None,
+        season: Optional[int] = None
+    ):
+        self.position = position
+        self.episode_name = episode_name
+        self.season_name = season_name
+        self.season = season
+
+    @classmethod
+    def from_dict(cls, data: Optional[dict], full_title: str = "") -> "SeriesInfo":
+        data = data or {}
+        season = SEASON_PATTERN.search(full_title or "")
+        return cls(
+            position=data.get("Position"),
+            episode_name=data.get("EpisodeName"),
+            season_name=_intern(data.get("SeasonName")),
+            season=int(season.group(1)) if season else None
+        )
+
+    def __repr__(self) -> str:
+        return f"SeriesInfo(season={self.season!r}, position={self.position!r})"
+
+class Media:
+    """
+    Compact form of a find_media result (movie, series, season or episode).
+
+    The fields used to plan downloads are parsed eagerly into slots. The rarely used groups
+    (Metadata, FileInfo, Images, Price, Smooth) are kept as one compact JSON blob and only
+    decoded when accessed, which makes a Media several times smaller than its source dict.
+    """
+    __slots__ = ("id", "parent_id", "full_title", "year", "series_info", "subtitles", "_groups")
+
+    def __init__(
+        self,
+        id: int,
+        parent_id: Optional[int] = None,
+        full_title: str = "",
+        year: int = 0,
+        series_info: Optional[SeriesInfo] = None,
+        subtitles: Tuple[Subtitle, ...] = (),
+        groups: Optional[bytes] = None
+    ):
+        self.id = id
+        self.parent_id = parent_id
+        self.full_title = full_title
+        self.year = year
+        self.series_info = series_info or SeriesInfo()
+        self.subtitles = subtitles
+        self._groups = groups
+
+    @classmethod
+    def from_dict(cls, data: dict, lazy_groups: bool = True) -> "Media":
+        """
+        Builds a Media from a find_media result or one of its 'Childs'.
+
+        :param data: The media dict.
+        :param lazy_groups: Keep the rarely used groups for later access, drop them otherwise.
+        """
+        file_info = data.get("FileInfo") or {}
+        groups = None
+        if lazy_groups:
+            groups = json.dumps(
+                {
+                    name: {k: v for k, v in file_info.items() if k != "Subtitles"} if name == "FileInfo" else data[name]
+                    for name in LAZY_GROUPS if data.get(name)
+                },
+                ensure_ascii=False,
+                separators=(",", ":")
+            ).encode("utf-8")
+
+        return cls(
+            id=data["Id"],
+            parent_id=data.get("ParentId") or None,
+            full_title=data.get("FullTitle") or "",
+            year=(data.get("Metadata") or {}).get("Year") or 0,
+            series_info=SeriesInfo.from_dict(data.get("SerieInfo"), data.get("FullTitle")),
+            subtitles=tuple(Subtitle.from_dict(subtitle) for subtitle in file_info.get("Subtitles") or []),
+            groups=groups
+        )
+
+    def group(self, name: str) -> Any:
+        """
+        Decodes one of the lazily parsed groups, e.g. media.group("Images").
+        """
+        if not self._groups:
+            return None
+        return json.loads(self._groups).get(name)
+
+    @property
+    def metadata(self) -> dict:
+        return self.group("Metadata") or {}
+
+    @property
+    def file_info(self) -> dict:
+        return self.group("FileInfo") or {}
+
+    @property
+    def images(self) -> list:
+        return self.group("Images") or []
+
+    @property
+    def price(self) -> dict:
+        return self.group("Price") or {}
+
+    @property
+    def smooth(self) -> dict:
+        return self.group("Smooth") or {}
+
+    @property
+    def is_episode(self) -> bool:
+        return bool(self.series_info.position)
+
+    def subtitle(self, language: str) -> Optional[Subtitle]:
+        language = language.lower()
+        for subtitle in self.subtitles:
+            if subtitle.code.lower() == language:
+                return subtitle
+        return None
+
+    def __repr__(self) -> str:
+        return f"Media(id={self.id!r}, full_title={self.full_title!r})"
@@ -0,0 +1,122 @@
+import time
+import random
+import threading
+
+from email.utils import parsedate_to_datetime
+from typing import Collection, Optional, Tuple, Union
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+THROTTLE_STATUSES = frozenset({429, 503})
+
+class RetryPolicy:
+    """
+    Timeouts, retries and backoff applied by the Transport to every request.
+    """
+    def __init__(
+        self,
+        timeout: Union[float, Tuple[float, float], None] = (10, 60),
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+        backoff_max: float = 30.0,
+        jitter: bool = True,
+        retry_statuses: Collection[int] = RETRY_STATUSES,
+        retry_after_max: float = 120.0
+    ):
+        """
+        :param timeout: Connect and read timeout in seconds, a single value for both, or None to wait forever.
+        :param retries: Maximum number of retries of an idempotent request.
+        :param backoff_factor: Base delay of the exponential backoff, doubled on every attempt.
+        :param backoff_max: Upper bound of a single backoff delay.
+        :param jitter: Randomize the delay between 0 and the exponential backoff ("full jitter").
+        :param retry_statuses: HTTP statuses considered transient.
+        :param retry_after_max: Upper bound of a delay requested by a Retry-After header.
+        """
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_after_max = retry_after_max
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Delay before retry number attempt + 1.
+        """
+        delay = min(self.backoff_factor * (2 ** attempt), self.backoff_max)
+        return random.uniform(0, delay) if self.jitter else delay
+
+    def retry_after(self, value: Optional[str]) -> Optional[float]:
+        """
+        Parses a Retry-After header, given either in seconds or as an HTTP date.
+        """
+        if not value:
+            return None
+        try:
+            delay = float(value)
+        except ValueError:
+            try:
+                delay = parsedate_to_datetime(value).timestamp() - time.time()
+            except (TypeError, ValueError):
+                return None
+        return min(max(delay, 0.0), self.retry_after_max)
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        Delay before the next attempt, honoring Retry-After when the server sent one.
+        """
+        requested = self.retry_after(retry_after)
+        if requested is not None:
+            return requested
+        return self.backoff(attempt)
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting the request rate to one host.
+
+    The rate adapts to throttling: it is halved whenever the server answers 429/503
+    and grows back additively on every successful response, up to the configured rate.
+    """
+    def __init__(self, rate: float, burst: Optional[float] = None, min_rate: Optional[float] = None):
+        """
+        :param rate: Sustained requests per second.
+        :param burst: Maximum number of requests sent back to back, defaults to rate.
+        :param min_rate: Lowest rate the bucket backs off to, defaults to a tenth of rate.
+        """
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate or rate / 10
+        self.capacity = max(burst or rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Takes one token, sleeping until one is available.
+
+        :return: Seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    self.waited += waited
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def throttled(self) -> None:
+        with self._lock:
+            self.rate = max(self.rate / 2, self.min_rate)
+
+    def succeeded(self) -> None:
+        with self._lock:
+            self.rate = min(self.rate + self.max_rate / 20, self.max_rate)
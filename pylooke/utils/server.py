@@ -0,0 +1,382 @@
+import os
+import json
+import time
+import logging
+import threading
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from socketserver import ThreadingMixIn, UnixStreamServer
+from typing import Callable, Dict, Iterator, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from requests import RequestException
+
+from pylooke.encripta.looke import Looke
+from pylooke.utils import body, download, subtitle
+from pylooke.utils.tracing import Histogram, Profiler
+
+# Latency samples kept per route for percentiles, and the window of the recent request rate.
+MAX_SAMPLES = 4096
+RATE_WINDOW = 60.0
+
+# Connections waiting to be accepted. With the default of 5, concurrent clients stall on SYN retransmits.
+REQUEST_QUEUE_SIZE = 256
+
+class ServiceError(Exception):
+    """
+    Error answered to the client with an HTTP status and a JSON body.
+    """
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+class ServiceMetrics:
+    """
+    Per-route request counts, errors, rejections, request rates and latency percentiles of the service.
+    """
+    def __init__(self, max_samples: int = MAX_SAMPLES):
+        self.max_samples = max_samples
+        self.started = time.monotonic()
+        self.routes = {}
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def _route(self, name: str) -> dict:
+        return self.routes.setdefault(name, {
+            "latency": Histogram(self.max_samples),
+            "recent": deque(maxlen=self.max_samples),
+            "errors": 0,
+            "rejected": 0
+        })
+
+    def begin(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def end(self, route: str, seconds: float, status: int) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            stats = self._route(route)
+            stats["latency"].add(seconds)
+            stats["recent"].append(time.monotonic())
+            stats["errors"] += status >= 500 and status != HTTPStatus.SERVICE_UNAVAILABLE
+            stats["rejected"] += status == HTTPStatus.SERVICE_UNAVAILABLE
+
+    def as_dict(self) -> dict:
+        now = time.monotonic()
+        uptime = now - self.started
+        window = min(RATE_WINDOW, uptime) or 1.0
+
+        with self._lock:
+            routes = {}
+            for name, stats in self.routes.items():
+                latency = stats["latency"].as_dict()
+                recent = sum(1 for stamp in stats["recent"] if stamp >= now - RATE_WINDOW)
+                routes[name] = {
+                    "requests": latency["count"],
+                    "errors": stats["errors"],
+                    "rejected": stats["rejected"],
+                    "rate_per_s": round(latency["count"] / uptime, 3) if uptime else 0.0,
+                    "recent_rate_per_s": round(recent / window, 3),
+                    "p50_ms": round(latency["p50_ms"], 3),
+                    "p90_ms": round(stats["latency"].percentile(0.90) * 1000, 3),
+                    "p95_ms": round(latency["p95_ms"], 3),
+                    "p99_ms": round(latency["p99_ms"], 3),
+                    "max_ms": round(latency["max_ms"], 3)
+                }
+
+            return {"uptime_s": round(uptime, 3), "in_flight": self.in_flight, "routes": routes}
+
+class LookeService:
+    """
+    State shared by every request of the daemon: one Looke client (pooled connections, find_media cache
+    and coalescing), the subtitle converter, concurrency limits and metrics.
+    """
+    def __init__(
+        self,
+        looke: Looke,
+        max_api_calls: int = 32,
+        max_conversions: Optional[int] = None,
+        convert_workers: Optional[int] = None,
+        queue_timeout: float = 10.0,
+        max_body_size: int = download.MAX_SIZE
+    ):
+        """
+        :param looke: Client shared by the API endpoints.
+        :param max_api_calls: Requests to find_media and children served at the same time.
+        :param max_conversions: Conversions run at the same time, defaults to convert_workers or the number of CPUs.
+        :param convert_workers: Convert on a pool of this many processes instead of in the request threads.
+        :param queue_timeout: Seconds a request waits for a free slot before it is answered 503.
+        :param max_body_size: Largest subtitle accepted for conversion, in bytes.
+        """
+        self.looke = looke
+        self.profiler = Profiler(keep_events=False, max_samples=MAX_SAMPLES)
+        self.looke.hooks.append(self.profiler)
+        self.metrics = ServiceMetrics()
+        self.queue_timeout = queue_timeout
+        self.max_body_size = max_body_size
+        self.api_slots = threading.BoundedSemaphore(max_api_calls)
+        self.convert_slots = threading.BoundedSemaphore(max_conversions or convert_workers or os.cpu_count() or 1)
+        self.executor = ProcessPoolExecutor(max_workers=convert_workers) if convert_workers else None
+
+    @contextmanager
+    def slot(self, slots: threading.BoundedSemaphore) -> Iterator[None]:
+        """
+        Holds one of slots for the duration of a call.
+
+        :raises ServiceError: No slot freed up within queue_timeout.
+        """
+        if not slots.acquire(timeout=self.queue_timeout):
+            raise ServiceError(HTTPStatus.SERVICE_UNAVAILABLE, "Too many requests in flight, retry later.")
+        try:
+            yield
+        finally:
+            slots.release()
+
+    @contextmanager
+    def upstream(self) -> Iterator[None]:
+        """
+        Holds an API slot for the duration of a call to the Looke API. The request was validated before,
+        so a response that could not be used (e.g. an error page instead of JSON) is the API's fault.
+
+        :raises ServiceError: No slot freed up within queue_timeout, or the response could not be decoded.
+        """
+        with self.slot(self.api_slots):
+            try:
+                yield
+            except (ValueError, KeyError) as e:
+                raise ServiceError(HTTPStatus.BAD_GATEWAY, f"Looke API returned an invalid response: {e}") from e
+
+    def find_media(self, media_id: int, media_type: int = 31, fields: body.Fields = None) -> dict:
+        with self.upstream():
+            return self.looke.find_media(media_id, media_type, fields=fields)
+
+    def children(self, media_id: int, page_size: int = 50, fields: body.Fields = None) -> list:
+        with self.upstream():
+            return list(self.looke.iter_children(media_id=media_id, page_size=page_size, fields=fields))
+
+    def convert(self, data: bytes, **options) -> bytes:
+        """
+        Converts a subtitle to SRT with subtitle.convert_bytes.
+
+        :raises ServiceError: The format was not recognized, or no conversion slot freed up in time.
+        """
+        with self.slot(self.convert_slots):
+            if self.executor:
+                srt = self.executor.submit(subtitle.convert_bytes, data, **options).result()
+            else:
+                srt = subtitle.convert_bytes(data, hooks=self.looke.hooks, **options)
+
+        if srt is None:
+            raise ServiceError(HTTPStatus.UNPROCESSABLE_ENTITY, "Subtitle format was unrecognized.")
+        return srt
+
+    def stats(self) -> dict:
+        looke = self.looke
+        return {
+            **self.metrics.as_dict(),
+            "upstream": self.profiler.as_dict(),
+            "transport": looke.transport.stats.as_dict(),
+            "single_flight": looke.single_flight.stats() if looke.single_flight else None,
+            "cache": looke.cache.stats() if looke.cache else None
+        }
+
+    def close(self) -> None:
+        if self.executor:
+            self.executor.shutdown()
+        self.looke.close()
+
+def _fields(query: dict) -> body.Fields:
+    value = query.get("fields", [None])[-1]
+    if value and ("," in value or "." in value or value not in body.PROFILES):
+        value = [field.strip() for field in value.split(",") if field.strip()]
+    body.project(value)
+    return value
+
+def _integer(query: dict, name: str, default: int) -> int:
+    value = query.get(name, [None])[-1]
+    if value is None:
+        return default
+    if not value.isdigit():
+        raise ValueError(f"Invalid {name}: '{value}'. It must be a numeric value.")
+    return int(value)
+
+def _flag(query: dict, name: str) -> bool:
+    return query.get(name, ["0"])[-1].lower() in ("1", "true", "yes")
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """
+    Routes of the service:
+
+        GET  /find_media/<id>?fields=subtitles&type=31   media details (JSON)
+        GET  /children/<id>?fields=catalog&page_size=50  every child of a media (JSON list)
+        POST /convert?language=pt-BR&encoding=utf-8      subtitle in the body, SRT in the response
+             &no_post_processing=1&keep_short_gaps=1
+        GET  /metrics                                    request rates, latency percentiles and client stats
+        GET  /health                                     liveness probe
+    """
+    protocol_version = "HTTP/1.1"
+    server_version = "pylooke"
+    service: LookeService
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def dispatch(self, method: str) -> None:
+        parts = urlsplit(self.path)
+        segments = [segment for segment in parts.path.split("/") if segment]
+        query = parse_qs(parts.query)
+        name = segments[0] if segments else ""
+        route = f"{method} /{name}"
+
+        routes: Dict[Tuple[str, str], Callable[[list, dict], None]] = {
+            ("GET", "find_media"): self.find_media,
+            ("GET", "children"): self.children,
+            ("POST", "convert"): self.convert,
+            ("GET", "metrics"): self.metrics,
+            ("GET", "health"): self.health
+        }
+
+        handler = routes.get((method, name))
+        if handler is None:
+            route = f"{method} (unknown)"
+
+        self.body_read = False
+        self.service.metrics.begin()
+        start = time.perf_counter()
+        status = HTTPStatus.INTERNAL_SERVER_ERROR
+
+        try:
+            if handler is None:
+                raise ServiceError(HTTPStatus.NOT_FOUND, f"No route for {method} {parts.path}.")
+            status = handler(segments[1:], query)
+        except ServiceError as e:
+            status = self.send_error_json(str(e), e.status)
+        except ValueError as e:
+            # Invalid route or query parameters, upstream responses that could not be decoded are ServiceErrors.
+            status = self.send_error_json(str(e), HTTPStatus.BAD_REQUEST)
+        except Looke.Exceptions.FindMediaError as e:
+            status = self.send_error_json(f"Media not found: {e}", HTTPStatus.NOT_FOUND)
+        except RequestException as e:
+            status = self.send_error_json(f"Looke API request failed: {e}", HTTPStatus.BAD_GATEWAY)
+        except Exception as e:
+            logging.getLogger("serve").exception(f"{route} failed")
+            self.send_error_json(f"{type(e).__name__}: {e}", status)
+        finally:
+            self.service.metrics.end(route, time.perf_counter() - start, status)
+
+    def media_id(self, segments: list) -> int:
+        if len(segments) != 1 or not segments[0].isdigit():
+            raise ValueError("Expected a numeric media ID in the path.")
+        return int(segments[0])
+
+    def find_media(self, segments: list, query: dict) -> int:
+        media_id, media_type, fields = self.media_id(segments), _integer(query, "type", 31), _fields(query)
+        return self.send_json(self.service.find_media(media_id, media_type=media_type, fields=fields))
+
+    def children(self, segments: list, query: dict) -> int:
+        media_id, page_size, fields = self.media_id(segments), _integer(query, "page_size", 50), _fields(query)
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1.")
+        return self.send_json(self.service.children(media_id, page_size=page_size, fields=fields))
+
+    def convert(self, segments: list, query: dict) -> int:
+        length = self.headers.get("Content-Length")
+        if not (length and length.isdigit()):
+            raise ServiceError(HTTPStatus.LENGTH_REQUIRED, "A Content-Length is required.")
+        if int(length) > self.service.max_body_size:
+            raise ServiceError(
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                f"Subtitle is {length} bytes, over the limit of {self.service.max_body_size} bytes."
+            )
+
+        data = self.rfile.read(int(length))
+        self.body_read = True
+        srt = self.service.convert(
+            data,
+            language=query.get("language", [None])[-1],
+            encoding=query.get("encoding", ["utf-8"])[-1],
+            no_post_processing=_flag(query, "no_post_processing"),
+            keep_short_gaps=_flag(query, "keep_short_gaps")
+        )
+        return self.send_bytes(srt, "application/x-subrip")
+
+    def metrics(self, segments: list, query: dict) -> int:
+        return self.send_json(self.service.stats())
+
+    def health(self, segments: list, query: dict) -> int:
+        return self.send_json({"status": "ok"})
+
+    def send_error_json(self, message: str, status: HTTPStatus) -> int:
+        # A request body left unread would be parsed as the next request of the connection.
+        return self.send_json({"error": message}, status, close=self.command == "POST" and not self.body_read)
+
+    def send_json(self, data, status: HTTPStatus = HTTPStatus.OK, close: bool = False) -> int:
+        return self.send_bytes(
+            json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+            "application/json",
+            status,
+            close
+        )
+
+    def send_bytes(self, data: bytes, content_type: str, status: HTTPStatus = HTTPStatus.OK, close: bool = False) -> int:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        if status == HTTPStatus.SERVICE_UNAVAILABLE:
+            self.send_header("Retry-After", "1")
+        if close:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(data)
+        return status
+
+    def address_string(self) -> str:
+        # Unix socket peers have no address.
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format: str, *args) -> None:
+        logging.getLogger("serve").debug(f"{self.address_string()} {format % args}")
+
+class ServiceHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = REQUEST_QUEUE_SIZE
+
+class ThreadingUnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = REQUEST_QUEUE_SIZE
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ""
+
+def make_server(
+    service: LookeService,
+    host: str = "127.0.0.1",
+    port: int = 8787,
+    unix_socket: Optional[Path] = None
+):
+    """
+    Builds the HTTP server of a service, listening on host:port or on a Unix socket.
+    The caller runs it with serve_forever and stops it with shutdown.
+    """
+    handler = type("BoundServiceHandler", (ServiceHandler,), {
+        "service": service,
+        "disable_nagle_algorithm": not unix_socket
+    })
+
+    if unix_socket:
+        unix_socket = Path(unix_socket)
+        if unix_socket.is_socket():
+            unix_socket.unlink()
+        return ThreadingUnixHTTPServer(str(unix_socket), handler)
+
+    return ServiceHTTPServer((host, port), handler)
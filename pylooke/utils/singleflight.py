@@ -0,0 +1,85 @@
+import asyncio
+import threading
+
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+class SingleFlight:
+    """
+    Coalesces identical calls made at the same time from several threads: the first caller of a key
+    runs the call, the others wait for it and get the same result (or exception).
+    Nothing is kept once the call returns, later callers run it again.
+    """
+    def __init__(self):
+        self.calls = 0
+        self.shared = 0
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Runs fn, unless a call with the same key is in flight, in which case its result is shared.
+
+        :param key: Identifies identical calls, e.g. endpoint and normalized body.
+        :param fn: The call.
+
+        :return: Result of fn, shared by every caller of the key.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"calls": self.calls, "shared": self.shared, "in_flight": len(self._calls)}
+
+class AsyncSingleFlight:
+    """
+    Coroutine counterpart of SingleFlight for one event loop. The call runs in its own task,
+    so cancelling one waiter does not cancel it for the others.
+    """
+    def __init__(self):
+        self.calls = 0
+        self.shared = 0
+        self._calls: Dict[Hashable, "asyncio.Future"] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+            self.calls += 1
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "shared": self.shared, "in_flight": len(self._calls)}
@@ -0,0 +1,127 @@
+import re
+import struct
+
+from enum import Enum
+from typing import NamedTuple, Optional
+
+class SubtitleFormat(Enum):
+    ISMT = "ISMT (DFXP in MP4)"
+    WVTT = "WVTT (WebVTT in MP4)"
+    SAMI = "SAMI"
+    TTML = "DFXP/TTML/TTML2"
+    WEBVTT = "WebVTT"
+    BILIBILI = "JSON (Bilibili)"
+    UNKNOWN = "Unknown"
+
+class Detection(NamedTuple):
+    format: SubtitleFormat
+    confidence: float
+
+MP4_BOX_TYPES = {
+    b"ftyp", b"styp", b"moov", b"moof", b"mdat", b"sidx", b"free", b"skip", b"emsg", b"prft", b"mfra", b"uuid"
+}
+
+HEAD_SIZE = 4096
+
+TOKENS = (b"mdat", b"moof", b"</tt>", b"</tt:tt>", b"vttc", b"<SAMI>", b"WEBVTT", b'"Stroke"', b'"background_color"')
+
+PATTERN = re.compile(b"|".join(re.escape(token) for token in TOKENS))
+
+def detect(data: bytes) -> Detection:
+    """
+    Detects the format of a subtitle.
+
+    Header and MP4 box magic are checked first, which only touches the start of the data
+    (and the box headers for MP4). Anything else falls back to a single multi-pattern scan
+    with the same precedence as the original substring checks.
+
+    :param data: Raw subtitle, bytes or any buffer supporting slicing, find and re (e.g. an mmap).
+
+    :return: Detected format and how confident the detection is, from 0.0 to 1.0.
+    """
+    detection = _detect_mp4(data) or _detect_head(data)
+    if detection:
+        return detection
+
+    return _detect_scan(data)
+
+def _detect_mp4(data: bytes) -> Optional[Detection]:
+    boxes = {}
+    offset = 0
+    length = len(data)
+
+    while offset + 8 <= length:
+        size, box_type = struct.unpack_from(">I4s", data, offset)
+        if box_type not in MP4_BOX_TYPES:
+            break
+        header = 8
+        if size == 1:
+            if offset + 16 > length:
+                break
+            size = struct.unpack_from(">Q", data, offset + 8)[0]
+            header = 16
+        elif size == 0:
+            size = length - offset
+        if size < header:
+            break
+        boxes.setdefault(box_type, (offset + header, offset + size))
+        offset += size
+
+    if not boxes:
+        return None
+
+    if b"moov" in boxes:
+        start, end = boxes[b"moov"]
+        if data.find(b"stpp", start, end) != -1:
+            return Detection(SubtitleFormat.ISMT, 1.0)
+        if data.find(b"wvtt", start, end) != -1:
+            return Detection(SubtitleFormat.WVTT, 1.0)
+
+    if b"moof" in boxes and b"mdat" in boxes:
+        start, end = boxes[b"mdat"]
+        if data.find(b"</tt>", start, end) != -1:
+            return Detection(SubtitleFormat.ISMT, 0.9)
+        if data.find(b"vttc", start, end) != -1:
+            return Detection(SubtitleFormat.WVTT, 0.9)
+        return Detection(SubtitleFormat.UNKNOWN, 0.0)
+
+    return None
+
+def _detect_head(data: bytes) -> Optional[Detection]:
+    head = data[:HEAD_SIZE].lstrip(b"\xef\xbb\xbf \t\r\n")
+
+    if head.startswith(b"WEBVTT"):
+        return Detection(SubtitleFormat.WEBVTT, 1.0)
+
+    if head.startswith(b"<"):
+        if b"<SAMI>" in head:
+            return Detection(SubtitleFormat.SAMI, 1.0)
+        if b"<tt " in head or b"<tt>" in head or b"<tt:tt " in head or b"<tt:tt>" in head:
+            return Detection(SubtitleFormat.TTML, 0.95)
+
+    return None
+
+def _detect_scan(data: bytes) -> Detection:
+    found = set()
+    for match in PATTERN.finditer(data):
+        found.add(match.group())
+        if len(found) == len(TOKENS):
+            break
+
+    if b"mdat" in found and b"moof" in found:
+        if b"</tt>" in found:
+            return Detection(SubtitleFormat.ISMT, 0.7)
+        if b"vttc" in found:
+            return Detection(SubtitleFormat.WVTT, 0.7)
+        return Detection(SubtitleFormat.UNKNOWN, 0.0)
+    if b"<SAMI>" in found:
+        return Detection(SubtitleFormat.SAMI, 0.8)
+    if b"</tt>" in found or b"</tt:tt>" in found:
+        return Detection(SubtitleFormat.TTML, 0.8)
+    if b"WEBVTT" in found:
+        return Detection(SubtitleFormat.WEBVTT, 0.6)
+    # Slicing, since memory-mapped files (see download.map_file) have no startswith.
+    if data[:1] == b"{" and b'"Stroke"' in found and b'"background_color"' in found:
+        return Detection(SubtitleFormat.BILIBILI, 0.9)
+
+    return Detection(SubtitleFormat.UNKNOWN, 0.0)
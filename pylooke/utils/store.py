@@ -0,0 +1,327 @@
+import os
+import json
+import errno
+import shutil
+import hashlib
+import logging
+import threading
+import time
+
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from pylooke.utils import download, subtitle
+from pylooke.utils.cache import DEFAULT_CACHE_DIR
+from pylooke.utils.singleflight import SingleFlight
+from pylooke.utils.tracing import Hook
+
+DEFAULT_STORE_DIR = DEFAULT_CACHE_DIR / "store"
+DEFAULT_MAX_SIZE = 512 * 1024 * 1024
+
+# Defaults of subtitle.convert_bytes, part of every conversion key.
+CONVERSION_OPTIONS = {
+    "language": None,
+    "encoding": "utf-8",
+    "no_post_processing": False,
+    "keep_short_gaps": False,
+    "shift": 0,
+    "framerate": None
+}
+
+# ioctl request cloning a whole file on Btrfs/XFS (linux/fs.h).
+FICLONE = 0x40049409
+
+def _converter_version() -> str:
+    try:
+        from importlib.metadata import version
+        return version("subby")
+    except Exception:
+        return "unknown"
+
+def _reflink(source: Path, dest: Path) -> None:
+    import fcntl
+
+    with open(source, "rb") as src, open(dest, "wb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            os.unlink(dest)
+            raise
+
+def link_file(source: Path, dest: Path, hardlink: bool = False) -> str:
+    """
+    Places a copy of source at dest, sharing its blocks when the filesystem allows it:
+    a reflink (copy on write, Btrfs/XFS), else a plain copy. dest is replaced atomically,
+    so an existing hardlink to another file is never written through.
+
+    :param hardlink: Try a hardlink before copying. source and dest are then the same file,
+        an in-place edit of one changes the other.
+
+    :return: "reflink", "hardlink" or "copy".
+    """
+    dest = Path(dest)
+    temporary = dest.with_name(f".{dest.name}.{os.getpid()}.{threading.get_ident()}.link")
+
+    for method in ("reflink", "hardlink", "copy") if hardlink else ("reflink", "copy"):
+        try:
+            if method == "reflink":
+                if not hasattr(os, "uname") or os.uname().sysname != "Linux":
+                    continue
+                _reflink(source, temporary)
+            elif method == "hardlink":
+                os.link(source, temporary)
+            else:
+                shutil.copyfile(source, temporary)
+        except OSError as e:
+            if method == "copy" or e.errno not in (
+                errno.EXDEV, errno.EPERM, errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.EMLINK, errno.EACCES
+            ):
+                raise
+            continue
+        os.replace(temporary, dest)
+        return method
+
+class SubtitleStore:
+    """
+    Content-addressed store of raw subtitles and their SRT conversions.
+
+    Raw blobs are keyed by their sha256, conversions by the sha256 of the raw blob, the conversion
+    options and the converter version, so the same bytes reached again (a rerun, another media ID
+    or another URL) are converted once. Outputs are reflinked or copied from the store (see link_file)
+    instead of converted again. The store is kept under max_size by evicting the least recently used blobs.
+    """
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        max_size: Optional[int] = DEFAULT_MAX_SIZE,
+        hardlink: bool = False
+    ):
+        """
+        Opens the store, creating it if needed.
+
+        :param path: Folder of the store, defaults to DEFAULT_STORE_DIR.
+        :param max_size: Maximum total size of the stored blobs in bytes, None for no limit.
+        :param hardlink: Hardlink files to and from the store when they cannot be reflinked, instead of
+            copying them. Saves space, but an in-place edit of an output then changes the store and every
+            other output of the same conversion (hardlinked outputs keep their content when evicted).
+        """
+        self.path = Path(path or DEFAULT_STORE_DIR)
+        self.max_size = max_size
+        self.hardlink = hardlink
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.links = {"reflink": 0, "hardlink": 0, "copy": 0}
+        self.single_flight = SingleFlight()
+        self.converter_version = _converter_version()
+
+        self._lock = threading.Lock()
+        self._pins = Counter()
+
+        import sqlite3
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path / "store.sqlite3"), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            "key TEXT PRIMARY KEY, kind TEXT NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS blobs_accessed ON blobs (accessed)")
+        self._db.commit()
+        self.size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        self.evict()
+
+    def blob_path(self, key: str, kind: str = "raw") -> Path:
+        folder = "objects" if kind == "raw" else "srt"
+        suffix = ".srt" if kind == "srt" else ""
+        return self.path / folder / key[:2] / f"{key}{suffix}"
+
+    def conversion_key(self, sha256: str, **options) -> str:
+        """
+        Builds the key of the conversion of the raw blob sha256 with options (see subtitle.convert_bytes).
+        """
+        normalized = json.dumps(
+            [sha256, {**CONVERSION_OPTIONS, **options}, self.converter_version, subtitle.CONVERSION_VERSION],
+            sort_keys=True,
+            separators=(",", ":")
+        )
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    def add(self, file: Path, sha256: Optional[str] = None) -> str:
+        """
+        Adds a raw subtitle file to the store, linked rather than copied when possible.
+
+        :param file: The subtitle file, left in place.
+        :param sha256: Its sha256 hex digest, computed if omitted.
+
+        :return: The sha256 key of the blob.
+        """
+        sha256 = sha256 or download.digest_file(file)
+        blob = self.blob_path(sha256)
+
+        if not self._touch(sha256, blob):
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            self.link(file, blob)
+            with self.pinned([sha256]):
+                self._record(sha256, "raw", blob.stat().st_size)
+
+        return sha256
+
+    def get(self, key: str) -> Optional[Path]:
+        """
+        Returns the stored SRT of a conversion key, or None when it was never converted or was evicted.
+        """
+        if self._touch(key, self.blob_path(key, "srt")):
+            with self._lock:
+                self.hits += 1
+            return self.blob_path(key, "srt")
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, srt: bytes) -> Path:
+        """
+        Stores the SRT of a conversion key.
+
+        :return: The stored file, to be linked to the output while pinned (see link).
+        """
+        blob = self.blob_path(key, "srt")
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        download.write_file(blob, srt)
+        with self.pinned([key]):
+            self._record(key, "srt", len(srt))
+        return blob
+
+    def convert(self, file: Path, out: Path, hooks: Iterable[Hook] = (), **options) -> Optional[Path]:
+        """
+        Converts a raw subtitle file to SRT, or reuses the stored conversion of the same bytes and options,
+        and links it to out. Identical conversions running at the same time are done once.
+
+        :param file: The subtitle file, added to the store.
+        :param out: Output SRT file.
+        :param hooks: Tracing hooks of the conversion, only called when it actually runs.
+        :param options: Options of subtitle.convert_bytes.
+
+        :return: out, or None when the conversion failed.
+        """
+        key = self.conversion_key(self.add(file), **options)
+
+        def run() -> Optional[Path]:
+            stored = self.get(key)
+            if stored:
+                return stored
+
+            with download.map_file(file) as data:
+                srt = subtitle.convert_bytes(data=data, hooks=hooks, **options)
+
+            return self.put(key, srt) if srt is not None else None
+
+        with self.pinned([key]):
+            stored = self.single_flight.do(key, run)
+            return self.link(stored, out) if stored else None
+
+    @contextmanager
+    def pinned(self, keys: Iterable[str]) -> Iterator[None]:
+        """
+        Keeps the blobs of keys from being evicted, e.g. between storing a conversion and linking it.
+        """
+        keys = list(keys)
+        with self._lock:
+            self._pins.update(keys)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._pins.subtract(keys)
+                self._pins += Counter()
+
+    def link(self, source: Path, dest: Path) -> Path:
+        """
+        Links a stored blob to an output file, see link_file.
+
+        :return: dest.
+        """
+        method = link_file(source, dest, hardlink=self.hardlink)
+        with self._lock:
+            self.links[method] += 1
+        return Path(dest)
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used blobs, except the pinned ones, until the store is under max_size.
+        """
+        if not self.max_size:
+            return
+
+        with self._lock:
+            if self.size <= self.max_size:
+                return
+
+            rows = self._db.execute("SELECT key, kind, size FROM blobs ORDER BY accessed ASC").fetchall()
+            for key, kind, size in rows:
+                if self.size <= self.max_size:
+                    break
+                if key in self._pins:
+                    continue
+                try:
+                    os.unlink(self.blob_path(key, kind))
+                except FileNotFoundError:
+                    pass
+                self._db.execute("DELETE FROM blobs WHERE key = ?", (key,))
+                self.size -= size
+                self.evictions += 1
+            self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": self.size,
+                "links": dict(self.links)
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db:
+                self._db.close()
+                self._db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _touch(self, key: str, blob: Path) -> bool:
+        # Marks a blob as recently used, dropping its row when the file was removed behind our back.
+        with self._lock:
+            row = self._db.execute("SELECT size FROM blobs WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return False
+            if not blob.exists():
+                self._db.execute("DELETE FROM blobs WHERE key = ?", (key,))
+                self._db.commit()
+                self.size -= row[0]
+                return False
+            self._db.execute("UPDATE blobs SET accessed = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            return True
+
+    def _record(self, key: str, kind: str, size: int) -> None:
+        with self._lock:
+            row = self._db.execute("SELECT size FROM blobs WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO blobs (key, kind, size, accessed) VALUES (?, ?, ?, ?)",
+                (key, kind, size, time.time())
+            )
+            self._db.commit()
+            self.size += size - (row[0] if row else 0)
+
+        logging.getLogger("store").debug(f"Stored {kind} blob {key} ({size} bytes)")
+        self.evict()
@@ -0,0 +1,633 @@
+import logging
+import tempfile
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from contextlib import ExitStack, nullcontext
+from pathlib import Path
+from typing import FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from pathvalidate import sanitize_filename
+
+from pylooke.encripta.looke import Looke
+from pylooke.utils import body, download, subtitle
+from pylooke.utils.archive import ArchiveOutput
+from pylooke.utils.manifest import Manifest
+from pylooke.utils.models import Media, Subtitle
+from pylooke.utils.store import SubtitleStore
+
+def parse_media_id(value: str) -> int:
+    """
+    Parses a media ID or a Looke details URL (e.g. https://www.looke.com.br/detalhes/421002).
+
+    :param value: Media ID or URL.
+
+    :return: Numeric media ID.
+    """
+    value = value.strip()
+
+    if value[:4] == "http":
+        value = value.rstrip("/").split("/")[-1]
+
+    if not value.isdigit():
+        raise ValueError(f"Invalid media ID: '{value}'. It must be a numeric value.")
+
+    return int(value)
+
+# Subtitle formats that can be requested, with the Subtitle attribute holding their server-side URL.
+FORMATS = {
+    "srt": "url_srt",
+    "vtt": "url_vtt",
+    "ttml": "url_ttm"
+}
+
+def parse_languages(value: Union[str, Iterable[str], None]) -> Optional[FrozenSet[str]]:
+    """
+    Parses a comma separated list of language codes, or 'all'.
+
+    :return: Lowercase language codes, or None for every language.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.split(",")
+    codes = frozenset(code.strip().lower() for code in value if code.strip())
+    if not codes or "all" in codes:
+        return None
+    return codes
+
+def parse_formats(value: Union[str, Iterable[str]]) -> Tuple[str, ...]:
+    """
+    Parses a comma separated list of subtitle formats (see FORMATS), keeping their order of preference.
+    """
+    if isinstance(value, str):
+        value = value.split(",")
+    formats = tuple(dict.fromkeys(fmt.strip().lower() for fmt in value if fmt.strip()))
+    unknown = [fmt for fmt in formats if fmt not in FORMATS]
+    if unknown or not formats:
+        raise ValueError(f"Invalid formats: '{','.join(unknown)}'. Expected a list of: {', '.join(FORMATS)}.")
+    return formats
+
+class SubtitleJob(NamedTuple):
+    media: Media
+    subtitle: Subtitle
+    file: Path
+    url: str
+    convert: bool = True
+    keep: bool = False
+
+def expand_medias(
+    looke: Looke,
+    media_id: int,
+    season: Optional[int] = None,
+    all_season: bool = False,
+    workers: int = 1,
+    page_size: int = 50,
+    fields: body.Fields = "subtitles"
+) -> Iterator[dict]:
+    """
+    Resolves a media ID to the medias whose subtitles should be downloaded.
+
+    For series, the parent is looked up and every season is expanded into its episodes.
+    Seasons are paged through concurrently, but episodes keep the season order of the parent
+    and are yielded as soon as their season is expanded.
+
+    :param looke: Client used for the find_media calls.
+    :param media_id: The ID of the movie, season or episode.
+    :param season: Season number to expand, if any.
+    :param all_season: Expand every season of the series.
+    :param workers: Number of seasons fetched at the same time.
+    :param page_size: Number of children requested per page.
+    :param fields: Groups requested from find_media, only the ones needed to plan downloads by default.
+
+    :return: Medias in deterministic order.
+    """
+    data = looke.find_media(media_id, fields=fields)
+
+    if not (season or all_season):
+        yield data
+        return
+
+    parent_id = data.get("ParentId")
+    seasons_data = []
+    if parent_id:
+        seasons_data = list(looke.iter_children(
+            media_id=parent_id,
+            page_size=page_size,
+            fields=fields,
+            groups={
+                "GroupName": "PlayDetails",
+                "GroupProperties": "LastPosition|Status"
+            }
+        ))
+
+    expanded = False
+    if seasons_data and all(s["ParentId"] == parent_id for s in seasons_data):
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+            for episodes in executor.map(
+                lambda s: list(looke.iter_children(media_id=s["Id"], page_size=page_size, fields=fields)),
+                seasons_data
+            ):
+                expanded = expanded or bool(episodes)
+                yield from episodes
+    else:
+        childs = data.get("Childs") or []
+        if len(childs) >= page_size:
+            childs = looke.iter_children(media_id=media_id, page_size=page_size, fields=fields)
+        for episode in childs:
+            expanded = True
+            yield episode
+
+    if not expanded:
+        yield data
+
+def plan_subtitles(
+    medias: Iterable[Union[dict, Media]],
+    language: Union[str, Iterable[str], None],
+    output_folder: Path,
+    season: Optional[int] = None,
+    all_season: bool = False,
+    formats: Iterable[str] = ("srt",),
+    keep: bool = False
+) -> Iterator[SubtitleJob]:
+    """
+    Builds the download jobs for the given medias and creates their output folders.
+
+    Every requested language and format comes from one pass over the medias. SRT is downloaded as is
+    when the server has one (UrlSRT), otherwise it is converted from the first available source in the
+    order of formats, then VTT, then TTML. A URL is only downloaded once, even when it is both
+    converted and kept.
+
+    :param medias: Medias yielded by expand_medias.
+    :param language: Language codes of the subtitles to download, comma separated or a list, or 'all'.
+    :param output_folder: Root folder to save subtitles.
+    :param season: Season number to keep, ignored when all_season is set.
+    :param all_season: Keep episodes of every season.
+    :param formats: Formats to save (see FORMATS), in order of preference.
+    :param keep: Keep the source of converted subtitles too.
+
+    :return: Jobs in the same order as the medias.
+    """
+    logger = logging.getLogger("subrip")
+
+    languages = parse_languages(language)
+    formats = parse_formats(formats)
+    sources = [fmt for fmt in formats if fmt != "srt"] + ["vtt", "ttml"]
+    seen = set()
+
+    for result in medias:
+        media = result if isinstance(result, Media) else Media.from_dict(result, lazy_groups=False)
+
+        full_title = media.full_title
+        year = media.year
+        id_ = media.id
+
+        if not media.subtitles:
+            logger.warning(f"No subtitle for {full_title} - {year} (ID: {id_}).")
+            continue
+
+        if media.is_episode:
+            season_number = media.series_info.season
+            if season != season_number and not all_season:
+                continue
+            series_dir = Path(
+                sanitize_filename(
+                    filename=f"{full_title.split(' - ')[0].strip()} - S{str(season_number or 0).zfill(2)}"
+                )
+            )
+            folder = output_folder / series_dir
+        else:
+            folder = output_folder / Path(sanitize_filename(filename=f"{full_title} - {year}"))
+
+        folder.mkdir(parents=True, exist_ok=True)
+
+        for subtitle_data in media.subtitles:
+            if languages is not None and subtitle_data.code.lower() not in languages:
+                continue
+
+            urls = {fmt: getattr(subtitle_data, attribute) for fmt, attribute in FORMATS.items()}
+            # URL -> [convert, keep], in insertion order.
+            downloads = {}
+
+            if "srt" in formats:
+                if urls["srt"]:
+                    downloads[urls["srt"]] = [False, True]
+                else:
+                    source = next((urls[fmt] for fmt in sources if urls[fmt]), None)
+                    if source:
+                        downloads[source] = [True, keep]
+
+            for fmt in formats:
+                if fmt != "srt" and urls[fmt]:
+                    downloads.setdefault(urls[fmt], [False, True])[1] = True
+
+            if not downloads:
+                logger.warning(
+                    f"No subtitle in {', '.join(formats)} for {full_title} - {year} (ID: {id_}), "
+                    f"language {subtitle_data.code}."
+                )
+
+            for url, (convert, keep_file) in downloads.items():
+                if url in seen:
+                    continue
+                seen.add(url)
+
+                filename = sanitize_filename(
+                    filename=f"{full_title} {year} {subtitle_data.code} {id_}.{url.split('.')[-1]}"
+                )
+
+                yield SubtitleJob(
+                    media=media,
+                    subtitle=subtitle_data,
+                    file=folder / filename,
+                    url=url,
+                    convert=convert,
+                    keep=keep_file
+                )
+
+def manifest_key(job: SubtitleJob) -> str:
+    return Manifest.key(job.media.id, job.subtitle.code, job.url)
+
+def fetch_subtitle(
+    looke: Looke,
+    job: SubtitleJob,
+    keep: bool = False,
+    manifest: Optional[Manifest] = None,
+    max_size: Optional[int] = download.MAX_SIZE
+) -> Optional[Path]:
+    """
+    Streams a single subtitle to disk: to the job file when it is kept, to a file in the system
+    temporary folder otherwise (see download.staging_file), which the caller removes once converted.
+
+    With a manifest, finished subtitles are revalidated with a conditional GET (If-None-Match /
+    If-Modified-Since) when the CDN sent validators, and skipped outright when it did not.
+    Interrupted items are resumed from their kept original file when its hash still matches.
+
+    :param looke: Client used for the subtitle request.
+    :param job: The job to process.
+    :param keep: Write the original subtitle file.
+    :param manifest: Manifest of the output folder, if any.
+    :param max_size: Abort subtitles larger than this many bytes, None for no limit.
+
+    :raises Looke.Exceptions.DownloadError: The request failed (not 2xx), or the subtitle is too large or was truncated.
+
+    :return: Downloaded file, or None when it is unchanged since the last run.
+    """
+    logger = logging.getLogger("subrip")
+
+    media = job.media
+    url = job.url
+    key = manifest_key(job)
+    entry = manifest.get(key) if manifest else None
+    finished = manifest.is_finished(entry) if manifest else False
+    headers = {}
+
+    if finished:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        if not headers:
+            logger.info(f"Skipping {job.file.name}, already processed.")
+            return None
+    elif entry and entry.get("raw") and manifest.resolve(entry["raw"]).exists():
+        raw = manifest.resolve(entry["raw"])
+        if download.digest_file(raw) == entry.get("sha256"):
+            logger.info(f"Resuming {job.file.name} from the original file.")
+            return raw
+
+    logger.info(
+        f"Downloading subtitle for {media.full_title} - {media.year} (ID: {media.id}). "
+        f"Subtitle Name: {job.subtitle.name} - Language Code: {job.subtitle.code}"
+    )
+
+    response = looke.send_request(
+        method="GET",
+        url=url,
+        headers=headers,
+        stream=True
+    )
+
+    if finished and response.status_code == 304:
+        response.close()
+        logger.info(f"Skipping {job.file.name}, not modified since the last run.")
+        return None
+
+    download.check_status(response)
+
+    file = job.file if keep else download.staging_file()
+    try:
+        size, sha256 = download.stream_to_file(response, file, max_size=max_size)
+    except BaseException:
+        if not keep:
+            file.unlink()
+        raise
+
+    if finished and sha256 == entry.get("sha256"):
+        if not keep:
+            file.unlink()
+        logger.info(f"Skipping {job.file.name}, content unchanged since the last run.")
+        return None
+
+    if manifest:
+        manifest.update(
+            key,
+            media_id=media.id,
+            language=job.subtitle.code,
+            url=url,
+            sha256=sha256,
+            size=size,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            raw=manifest.relative(job.file) if keep else None,
+            status="downloaded"
+        )
+
+    return file
+
+def download_failed(job: SubtitleJob, error: Exception, manifest: Optional[Manifest] = None) -> bool:
+    logging.getLogger("subrip").error(f"Subtitle download failed: {job.file} ({error})")
+    if manifest:
+        manifest.update(manifest_key(job), status="failed")
+    return False
+
+def save_srt(job: SubtitleJob, srt: Union[bytes, Path, None], manifest: Optional[Manifest] = None) -> bool:
+    """
+    Writes the converted subtitle of a job and records the outcome in the manifest.
+    srt is a Path when the output was already linked from the subtitle store.
+
+    :return: False if the conversion failed, True otherwise.
+    """
+    logger = logging.getLogger("subrip")
+
+    if srt is None:
+        logger.error(f"Subtitle conversion failed: {job.file}")
+        if manifest:
+            manifest.update(manifest_key(job), status="failed")
+        return False
+
+    out = job.file.with_suffix(".srt")
+    if not isinstance(srt, Path):
+        download.write_file(out, srt)
+    logger.info(f"Saved to: {out}")
+
+    if manifest:
+        manifest.update(manifest_key(job), status="converted", output=manifest.relative(out))
+
+    return True
+
+def mark_saved(job: SubtitleJob, manifest: Optional[Manifest] = None) -> bool:
+    logging.getLogger("subrip").info(f"Saved to: {job.file}")
+    if manifest:
+        manifest.update(manifest_key(job), status="saved", output=manifest.relative(job.file))
+    return True
+
+def archive_job(job: SubtitleJob, archive: ArchiveOutput, manifest: Optional[Manifest] = None) -> None:
+    """
+    Moves the files saved for a job into the archive, as members named '<folder>/<file>' like in an output folder.
+    """
+    files = [job.file.with_suffix(".srt")] if job.convert else []
+    if job.keep and job.file not in files:
+        files.append(job.file)
+
+    output = None
+    for file in files:
+        if not file.exists():
+            continue
+        member = f"{file.parent.name}/{file.name}"
+        archive.add(member, file.read_bytes())
+        file.unlink()
+        output = output or member
+
+    if manifest and output:
+        manifest.update(manifest_key(job), output=output, raw=None)
+
+def download_subtitle(
+    looke: Looke,
+    job: SubtitleJob,
+    manifest: Optional[Manifest] = None,
+    max_size: Optional[int] = download.MAX_SIZE,
+    store: Optional[SubtitleStore] = None
+) -> bool:
+    """
+    Downloads a single subtitle and, if the job asks for it, converts it to SRT from a memory-mapped
+    view of the download. The downloaded file is only left on disk when the job keeps it.
+
+    :param looke: Client used for the subtitle request.
+    :param job: The job to process.
+    :param manifest: Manifest of the output folder, if any.
+    :param max_size: Abort subtitles larger than this many bytes, None for no limit.
+    :param store: Subtitle store reusing the conversions of identical subtitles, if any.
+
+    :return: False if the download or the conversion failed, True otherwise.
+    """
+    try:
+        file = fetch_subtitle(looke, job, keep=job.keep, manifest=manifest, max_size=max_size)
+    except Looke.Exceptions.DownloadError as e:
+        return download_failed(job, e, manifest)
+
+    if file is None:
+        return True
+
+    if not job.convert:
+        return mark_saved(job, manifest)
+
+    try:
+        if store:
+            srt = store.convert(file, job.file.with_suffix(".srt"), hooks=looke.hooks)
+        else:
+            with download.map_file(file) as data:
+                srt = subtitle.convert_bytes(
+                    data=data,
+                    hooks=looke.hooks
+                )
+    finally:
+        if file != job.file:
+            file.unlink()
+
+    return save_srt(job, srt, manifest)
+
+def download_subtitles(
+    looke: Looke,
+    jobs: Iterable[SubtitleJob],
+    workers: int = 1,
+    convert_workers: Optional[int] = None,
+    manifest: Optional[Manifest] = None,
+    max_size: Optional[int] = download.MAX_SIZE,
+    store: Optional[SubtitleStore] = None,
+    archive: Optional[ArchiveOutput] = None
+) -> List[bool]:
+    """
+    Downloads and converts subtitles with a pool of workers.
+    Jobs are submitted as they are produced, so downloads start before the whole tree is expanded.
+
+    :param looke: Client used for the subtitle requests.
+    :param jobs: Jobs yielded by plan_subtitles.
+    :param workers: Number of subtitles downloaded at the same time.
+    :param convert_workers: Convert on a process pool of this many workers instead of in the download threads,
+        each subtitle as soon as its download finishes.
+    :param manifest: Manifest of the output folder, used to skip subtitles finished by a previous run.
+    :param max_size: Abort subtitles larger than this many bytes, None for no limit.
+    :param store: Subtitle store reusing the conversions of identical subtitles, if any.
+    :param archive: Move the saved files of every finished job into this archive (see archive_job).
+
+    :return: Status of every job, in the same order as jobs.
+    """
+    if convert_workers:
+        jobs = list(jobs)
+        logger = logging.getLogger("subrip")
+        statuses: List[bool] = [True] * len(jobs)
+        staged = {}
+        # Conversion key (or job index without a store) -> jobs waiting for it, so identical
+        # subtitles of the batch are converted once.
+        waiting = {}
+        futures = {}
+
+        def fetch(job: SubtitleJob) -> Union[Path, bool, None]:
+            try:
+                file = fetch_subtitle(looke, job, keep=job.keep, manifest=manifest, max_size=max_size)
+            except Looke.Exceptions.DownloadError as e:
+                return download_failed(job, e, manifest)
+            if file is not None and not job.convert:
+                return mark_saved(job, manifest)
+            return file
+
+        def finish(index: int, status: bool) -> None:
+            statuses[index] = status
+            file = staged.pop(index, None)
+            if file is not None and file != jobs[index].file:
+                file.unlink()
+            if status and archive:
+                archive_job(jobs[index], archive, manifest)
+
+        def save(index: int, srt: Union[bytes, Path, None]) -> None:
+            if isinstance(srt, Path):
+                srt = store.link(srt, jobs[index].file.with_suffix(".srt"))
+            finish(index, save_srt(jobs[index], srt, manifest))
+
+        def discard() -> None:
+            # Downloads left unconverted when the batch is interrupted.
+            for index, file in staged.items():
+                if file != jobs[index].file:
+                    file.unlink()
+
+        # Each subtitle is sent to the conversion pool as soon as its download finishes,
+        # so downloads and conversions overlap.
+        with ExitStack() as stack:
+            stack.callback(discard)
+            downloader = stack.enter_context(ThreadPoolExecutor(max_workers=max(workers, 1)))
+            converter = stack.enter_context(ProcessPoolExecutor(max_workers=convert_workers))
+
+            for index, job in enumerate(jobs):
+                futures[downloader.submit(fetch, job)] = ("download", index)
+
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind, key = futures.pop(future)
+
+                    if kind == "convert":
+                        try:
+                            srt = future.result()
+                        except Exception as e:
+                            # Reported per file by save_srt, the rest of the batch goes on.
+                            logger.error(f"{type(e).__name__} while converting {jobs[waiting[key][0]].file}: {e}")
+                            srt = None
+                        if store and srt is not None:
+                            srt = store.put(key, srt)
+                        for index in waiting.pop(key):
+                            save(index, srt)
+                        continue
+
+                    index, file = key, future.result()
+                    if not isinstance(file, Path):
+                        finish(index, file is not False)
+                        continue
+
+                    staged[index] = file
+                    key = index
+                    if store:
+                        key = store.conversion_key(store.add(file))
+                        stack.enter_context(store.pinned([key]))
+                        stored = store.get(key)
+                        if stored:
+                            save(index, stored)
+                            continue
+
+                    if key in waiting:
+                        waiting[key].append(index)
+                        continue
+                    waiting[key] = [index]
+                    futures[converter.submit(subtitle.convert_bytes, file.read_bytes())] = ("convert", key)
+
+        return statuses
+
+    def process(job: SubtitleJob) -> bool:
+        status = download_subtitle(looke, job, manifest=manifest, max_size=max_size, store=store)
+        if status and archive:
+            archive_job(job, archive, manifest)
+        return status
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        return list(executor.map(process, jobs))
+
+def subrip(
+    looke: Looke,
+    media_id: int,
+    language: Union[str, Iterable[str], None] = "pt-BR",
+    output_folder: Path = Path("Subtitles"),
+    season: Optional[int] = None,
+    all_season: bool = False,
+    keep: bool = False,
+    convert_to_srt: bool = True,
+    workers: int = 1,
+    convert_workers: Optional[int] = None,
+    manifest: Optional[Manifest] = None,
+    max_size: Optional[int] = download.MAX_SIZE,
+    formats: Union[str, Iterable[str]] = ("srt",),
+    store: Optional[SubtitleStore] = None,
+    archive: Optional[ArchiveOutput] = None
+) -> List[bool]:
+    """
+    Downloads and processes the subtitles of a media ID, see expand_medias, plan_subtitles and download_subtitles.
+    Without convert_to_srt, the original subtitles are saved instead of SRT.
+
+    With an archive, subtitles are staged in a local temporary folder instead of output_folder
+    and moved into the archive as soon as they are finished, so the output volume only sees the archive.
+
+    :return: Status of every subtitle, in deterministic order.
+    """
+    formats = parse_formats(formats)
+    if not convert_to_srt:
+        formats = tuple(fmt for fmt in formats if fmt != "srt") or ("vtt",)
+
+    staging = tempfile.TemporaryDirectory(prefix="pylooke-") if archive else nullcontext()
+
+    with staging as staging_folder:
+        medias = expand_medias(
+            looke=looke,
+            media_id=media_id,
+            season=season,
+            all_season=all_season,
+            workers=workers
+        )
+
+        subtitle_jobs = plan_subtitles(
+            medias=medias,
+            language=language,
+            output_folder=Path(staging_folder) if staging_folder else output_folder,
+            season=season,
+            all_season=all_season,
+            formats=formats,
+            keep=keep
+        )
+
+        return download_subtitles(
+            looke=looke,
+            jobs=subtitle_jobs,
+            workers=workers,
+            convert_workers=convert_workers,
+            manifest=manifest,
+            max_size=max_size,
+            store=store,
+            archive=archive
+        )
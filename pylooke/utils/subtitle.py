@@ -1,12 +1,75 @@
+import os
+import time
 import logging
 
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Iterable, List, NamedTuple, Optional, Tuple, Union
 
-from subby import (
-    CommonIssuesFixer, BilibiliJSONConverter, ISMTConverter,
-    SAMIConverter, SMPTEConverter, WebVTTConverter, WVTTConverter
-)
+from pylooke.utils import sniffer, tracing
+from pylooke.utils.sniffer import SubtitleFormat
+from pylooke.utils.tracing import Hook
+
+if TYPE_CHECKING:
+    from pylooke.utils.timeline import Framerate
+
+CONVERTERS = {
+    SubtitleFormat.ISMT: "ISMTConverter",
+    SubtitleFormat.WVTT: "WVTTConverter",
+    SubtitleFormat.SAMI: "SAMIConverter",
+    SubtitleFormat.TTML: "SMPTEConverter",
+    SubtitleFormat.WEBVTT: "WebVTTConverter",
+    SubtitleFormat.BILIBILI: "BilibiliJSONConverter"
+}
+
+# Version of pylooke's own processing of converted subtitles (retiming and shifting on a CueTimeline).
+# Part of every subtitle store key with subby's version: bump it when that processing changes its output.
+CONVERSION_VERSION = 1
+
+def _subby():
+    # subby pulls in every converter and its parsers, so it is only imported once a conversion runs.
+    import subby
+    return subby
+
+class ConversionResult(NamedTuple):
+    index: int
+    source: Optional[Path]
+    out: Optional[Path]
+    srt: Optional[bytes]
+    error: Optional[str]
+    size: int
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+class ConversionSummary(NamedTuple):
+    results: List[ConversionResult]
+    elapsed: float
+
+    @property
+    def succeeded(self) -> int:
+        return sum(result.ok for result in self.results)
+
+    @property
+    def failed(self) -> int:
+        return len(self.results) - self.succeeded
+
+    @property
+    def items_per_second(self) -> float:
+        return len(self.results) / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def bytes_per_second(self) -> float:
+        return sum(result.size for result in self.results) / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.succeeded} converted, {self.failed} failed in {self.elapsed:.2f}s "
+            f"({self.items_per_second:.1f} subtitles/s, {self.bytes_per_second / 1024 / 1024:.2f} MiB/s)"
+        )
 
 def convert(
     file: Path,
@@ -14,7 +77,10 @@ def convert(
     language: Optional[str] = None,
     encoding: str = "utf-8",
     no_post_processing: bool = False,
-    keep_short_gaps: bool = False
+    keep_short_gaps: bool = False,
+    shift: int = 0,
+    framerate: Optional[Tuple["Framerate", "Framerate"]] = None,
+    hooks: Iterable[Hook] = ()
 ) -> bool:
     if not isinstance(file, Path):
         raise TypeError(f"Expected file to be a {Path} not {file!r}")
@@ -26,44 +92,201 @@ def convert(
 
     logger = logging.getLogger("convert")
 
-    data = file.read_bytes()
-    converter = None
-
-    if b"mdat" in data and b"moof" in data:
-        if b"</tt>" in data:
-            logger.info("Subtitle format: ISMT (DFXP in MP4)")
-            converter = ISMTConverter()
-        elif b"vttc" in data:
-            logger.info("Subtitle format: WVTT (WebVTT in MP4)")
-            converter = WVTTConverter()
-    elif b"<SAMI>" in data:
-        logger.info("Subtitle format: SAMI")
-        converter = SAMIConverter()
-    elif b"</tt>" in data or b"</tt:tt>" in data:
-        logger.info("Subtitle format: DFXP/TTML/TTML2")
-        converter = SMPTEConverter()
-    elif b"WEBVTT" in data:
-        logger.info("Subtitle format: WebVTT")
-        converter = WebVTTConverter()
-    elif data.startswith(b'{') and b'"Stroke"' in data and b'"background_color"' in data:
-        logger.info("Subtitle format: JSON (Bilibili)")
-        converter = BilibiliJSONConverter()
+    srt = convert_bytes(
+        data=file.read_bytes(),
+        language=language,
+        encoding=encoding,
+        no_post_processing=no_post_processing,
+        keep_short_gaps=keep_short_gaps,
+        shift=shift,
+        framerate=framerate,
+        hooks=hooks
+    )
+
+    if srt is None:
+        return False
+
+    out.write_bytes(srt)
+    logger.info(f"Saved to: {out}")
+
+    return True
+
+def convert_bytes(
+    data: bytes,
+    language: Optional[str] = None,
+    encoding: str = "utf-8",
+    no_post_processing: bool = False,
+    keep_short_gaps: bool = False,
+    shift: int = 0,
+    framerate: Optional[Tuple["Framerate", "Framerate"]] = None,
+    hooks: Iterable[Hook] = ()
+) -> Optional[bytes]:
+    """
+    Converts a subtitle to SRT.
+
+    :param shift: Milliseconds to move every cue by, earlier when negative.
+    :param framerate: (source, target) framerates to retime the cues for, e.g. (23.976, 25).
+        Retiming and shifting run on a CueTimeline (pylooke.utils.timeline) after post-processing,
+        without them the SRT is exported by subby as is.
+
+    :return: The SRT, or None when the subtitle format was unrecognized.
+    """
+    if not hooks:
+        return _convert_bytes(data, language, encoding, no_post_processing, keep_short_gaps, shift, framerate)
+
+    info = tracing.ConversionInfo(bytes_in=len(data))
+    tracing.call(hooks, "before_conversion", info)
+
+    try:
+        srt = _convert_bytes(data, language, encoding, no_post_processing, keep_short_gaps, shift, framerate, info)
+        info.ok = srt is not None
+        info.bytes_out = len(srt or b"")
+        return srt
+    except Exception as e:
+        info.error = tracing.error_name(e)
+        raise
+    finally:
+        info.end = time.perf_counter()
+        tracing.call(hooks, "after_conversion", info)
+
+def _convert_bytes(
+    data: bytes,
+    language: Optional[str],
+    encoding: str,
+    no_post_processing: bool,
+    keep_short_gaps: bool,
+    shift: int = 0,
+    framerate: Optional[Tuple["Framerate", "Framerate"]] = None,
+    info: Optional[tracing.ConversionInfo] = None
+) -> Optional[bytes]:
+    logger = logging.getLogger("convert")
+
+    detection = sniffer.detect(data)
+    converter = CONVERTERS.get(detection.format)
+
+    if info:
+        info.format = detection.format.name
 
     if not converter:
         logger.error("Subtitle format was unrecognized...")
-        return False
+        return None
+
+    logger.info(f"Subtitle format: {detection.format.value}")
+    logger.debug(f"Format detection confidence: {detection.confidence}")
+    subby = _subby()
+    converter = getattr(subby, converter)()
 
-    srt = converter.from_bytes(data)
+    # Sniffing works on any buffer (e.g. a memory-mapped download), the converters want bytes.
+    srt = converter.from_bytes(data if isinstance(data, bytes) else bytes(data))
     logger.info("Converted subtitle to SubRip (SRT)")
 
     if not no_post_processing:
-        processor = CommonIssuesFixer()
+        processor = subby.CommonIssuesFixer()
         processor.remove_gaps = not keep_short_gaps
         srt, status = processor.from_srt(srt, language=language)
         logger.info(f"Processed subtitle {['but no issues were found...', 'and repaired some issues!'][status]}")
 
-    srt.save(out, encoding=encoding)
-    logger.info(f"Saved to: {out}")
     logger.debug(f"Used character encoding {encoding}")
 
-    return True
\ No newline at end of file
+    if shift or framerate:
+        from pylooke.utils.timeline import CueTimeline
+
+        timeline = CueTimeline.from_subtitles(srt)
+        if framerate:
+            timeline.rescale(*framerate)
+            logger.info(f"Retimed subtitle from {framerate[0]} to {framerate[1]} fps")
+        if shift:
+            timeline.shift(shift)
+            logger.info(f"Shifted subtitle by {shift} ms")
+        return timeline.to_srt().encode(encoding)
+
+    return srt.export().encode(encoding)
+
+def convert_many(
+    items: Iterable[Union[Path, bytes]],
+    workers: Optional[int] = None,
+    chunk_size: int = 8,
+    language: Optional[str] = None,
+    encoding: str = "utf-8",
+    no_post_processing: bool = False,
+    keep_short_gaps: bool = False,
+    shift: int = 0,
+    framerate: Optional[Tuple["Framerate", "Framerate"]] = None
+) -> ConversionSummary:
+    """
+    Converts many subtitles to SRT on a process pool.
+
+    Paths are converted next to the source file (like convert), bytes are returned in the result.
+    Items are sent to the workers in chunks, and at most two chunks per worker are in flight,
+    so arbitrarily long inputs are processed with bounded memory. A failing item is reported in
+    its result instead of aborting the batch.
+
+    :param items: Subtitle files or raw subtitle blobs.
+    :param workers: Number of worker processes, defaults to the number of CPUs.
+    :param chunk_size: Number of items sent to a worker at once.
+
+    :return: Per-item results in input order, with throughput figures.
+    """
+    logger = logging.getLogger("convert")
+
+    workers = workers or os.cpu_count() or 1
+    options = {
+        "language": language,
+        "encoding": encoding,
+        "no_post_processing": no_post_processing,
+        "keep_short_gaps": keep_short_gaps,
+        "shift": shift,
+        "framerate": framerate
+    }
+
+    start = time.perf_counter()
+    results = []
+    pending = deque()
+    items = enumerate(items)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while True:
+            chunk = list(islice(items, chunk_size))
+            if chunk:
+                pending.append(executor.submit(_convert_chunk, chunk, options))
+            if pending and (not chunk or len(pending) >= workers * 2):
+                results.extend(pending.popleft().result())
+            if not chunk and not pending:
+                break
+
+    summary = ConversionSummary(results=results, elapsed=time.perf_counter() - start)
+
+    for result in summary.results:
+        if not result.ok:
+            logger.error(f"Conversion of item {result.index} ({result.source or 'bytes'}) failed: {result.error}")
+
+    logger.info(f"Batch conversion: {summary}")
+
+    return summary
+
+def _convert_chunk(chunk: list, options: dict) -> List[ConversionResult]:
+    results = []
+
+    for index, item in chunk:
+        source = item if isinstance(item, Path) else None
+        out = None
+        srt = None
+        size = 0
+        error = None
+
+        try:
+            data = item.read_bytes() if source else bytes(item)
+            size = len(data)
+            srt = convert_bytes(data=data, **options)
+            if srt is None:
+                error = "Subtitle format was unrecognized"
+            elif source:
+                out = source.with_suffix(".srt")
+                out.write_bytes(srt)
+                srt = None
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+
+        results.append(ConversionResult(index=index, source=source, out=out, srt=srt, error=error, size=size))
+
+    return results
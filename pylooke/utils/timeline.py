@@ -0,0 +1,257 @@
+import re
+
+from array import array
+from datetime import timedelta
+from fractions import Fraction
+from typing import Iterable, List, Optional, Tuple, Union
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Tried in this order when no backend is chosen, the first one installed is used.
+BACKENDS = ("numpy", "array")
+
+# Framerates are turned into fractions with at most this denominator: 23.976 -> 2997/125, 24000/1001 stays exact.
+MAX_FRAMERATE_DENOMINATOR = 100_000
+
+_MICROSECOND = timedelta(microseconds=1)
+_MULTI_NEWLINE = re.compile(r"\n\n+")
+_BLOCK = "%d\n%02d:%02d:%02d,%03d --> %02d:%02d:%02d,%03d%s\n%s\n\n"
+
+Framerate = Union[int, float, str, Fraction]
+
+def _legal_content(content: str) -> str:
+    # Same as srt.make_legal_content: no blank lines, no leading or trailing empty line.
+    if content and content[0] != "\n" and "\n\n" not in content:
+        return content
+    return _MULTI_NEWLINE.sub("\n", content.strip("\n"))
+
+def _ratio(source: Framerate, target: Framerate) -> Fraction:
+    source = Fraction(source).limit_denominator(MAX_FRAMERATE_DENOMINATOR)
+    target = Fraction(target).limit_denominator(MAX_FRAMERATE_DENOMINATOR)
+    if source <= 0 or target <= 0:
+        raise ValueError(f"Invalid framerates: {source} -> {target}. They must be positive.")
+    return source / target
+
+def _round_div(value: int, numerator: int, denominator: int) -> int:
+    # value * numerator / denominator rounded half to even, like round(Fraction(...)).
+    quotient, remainder = divmod(value * numerator, denominator)
+    if 2 * remainder > denominator or (2 * remainder == denominator and quotient % 2):
+        quotient += 1
+    return quotient
+
+class CueTimeline:
+    """
+    Cues of a subtitle held as columns instead of one object per cue: start and end times in integer
+    microseconds (numpy int64 arrays, or array('q') without numpy), and per cue an index into a table of
+    its distinct (content, proprietary) texts, so repeated lines are stored once.
+
+    Timing operations run on whole columns. to_srt renders like srt.compose, which subby's SubRipFile.export
+    uses: cues sorted by (start, end, index), cues without content, starting before 0 or not ending after
+    their start dropped, blank lines removed from the content and cues numbered from 1. Exporting the cues
+    a timeline was built from and calling to_srt on it give the same SRT.
+    """
+    __slots__ = ("backend", "starts", "ends", "indexes", "texts", "table")
+
+    def __init__(
+        self,
+        starts: Iterable[int] = (),
+        ends: Iterable[int] = (),
+        texts: Iterable[int] = (),
+        table: Iterable[Tuple[str, str]] = (),
+        indexes: Optional[Iterable[int]] = None,
+        backend: Optional[str] = None
+    ):
+        """
+        :param starts: Start times in microseconds.
+        :param ends: End times in microseconds.
+        :param texts: Per cue, the position of its text in table.
+        :param table: Distinct (content, proprietary) texts.
+        :param indexes: Original SRT indexes, breaking ties when sorting. Defaults to the cue positions.
+        :param backend: One of BACKENDS, or None for the first one installed.
+        """
+        backend = backend or ("numpy" if numpy is not None else "array")
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown timeline backend: '{backend}'. Expected one of: {', '.join(BACKENDS)}.")
+        if backend == "numpy" and numpy is None:
+            raise ImportError("The numpy timeline backend requires numpy, install it with: pip install numpy")
+
+        self.backend = backend
+        self.starts = self._column(starts)
+        self.ends = self._column(ends)
+        self.texts = self._column(texts, "l")
+        self.indexes = self._column(range(len(self.starts)) if indexes is None else indexes)
+        self.table: List[Tuple[str, str]] = list(table)
+
+        if not len(self.starts) == len(self.ends) == len(self.texts) == len(self.indexes):
+            raise ValueError("Every column of a timeline must have one value per cue.")
+
+    @classmethod
+    def from_subtitles(cls, subtitles: Iterable, backend: Optional[str] = None) -> "CueTimeline":
+        """
+        Builds a timeline from srt.Subtitle-like cues (index, start and end timedeltas, content, proprietary),
+        e.g. the SubRipFile returned by subby's converters.
+        """
+        starts, ends, indexes, texts = [], [], [], []
+        table, positions = [], {}
+
+        for position, cue in enumerate(subtitles):
+            starts.append(cue.start // _MICROSECOND)
+            ends.append(cue.end // _MICROSECOND)
+            indexes.append(position if cue.index is None else cue.index)
+
+            text = (cue.content, getattr(cue, "proprietary", "") or "")
+            text_position = positions.get(text)
+            if text_position is None:
+                text_position = positions[text] = len(table)
+                table.append(text)
+            texts.append(text_position)
+
+        return cls(starts, ends, texts, table, indexes, backend)
+
+    def _column(self, values: Iterable[int], typecode: str = "q"):
+        if self.backend == "numpy":
+            return numpy.array(values, dtype=numpy.int64 if typecode == "q" else numpy.int32)
+        return array(typecode, values)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def sort(self) -> "CueTimeline":
+        """
+        Orders the cues by (start, end, index), keeping the order of equal cues.
+        """
+        if self.backend == "numpy":
+            order = numpy.lexsort((self.indexes, self.ends, self.starts))
+            self.starts, self.ends = self.starts[order], self.ends[order]
+            self.texts, self.indexes = self.texts[order], self.indexes[order]
+        else:
+            starts, ends, indexes = self.starts, self.ends, self.indexes
+            order = sorted(range(len(starts)), key=lambda i: (starts[i], ends[i], indexes[i]))
+            for name in ("starts", "ends", "texts", "indexes"):
+                column = getattr(self, name)
+                setattr(self, name, array(column.typecode, [column[i] for i in order]))
+        return self
+
+    def merge_gaps(self, max_gap: int) -> "CueTimeline":
+        """
+        Closes short gaps: a cue followed by the next one within max_gap milliseconds is extended up to it.
+        """
+        self.sort()
+        max_gap *= 1000
+
+        if self.backend == "numpy":
+            gaps = self.starts[1:] - self.ends[:-1]
+            close = (gaps > 0) & (gaps <= max_gap)
+            self.ends[:-1][close] = self.starts[1:][close]
+        else:
+            starts, ends = self.starts, self.ends
+            for i in range(len(starts) - 1):
+                if 0 < starts[i + 1] - ends[i] <= max_gap:
+                    ends[i] = starts[i + 1]
+        return self
+
+    def fix_overlaps(self) -> "CueTimeline":
+        """
+        Ends a cue when the next one starts, unless both start together (e.g. two speakers shown at once).
+        """
+        self.sort()
+
+        if self.backend == "numpy":
+            overlapping = (self.ends[:-1] > self.starts[1:]) & (self.starts[1:] > self.starts[:-1])
+            self.ends[:-1][overlapping] = self.starts[1:][overlapping]
+        else:
+            starts, ends = self.starts, self.ends
+            for i in range(len(starts) - 1):
+                if ends[i] > starts[i + 1] > starts[i]:
+                    ends[i] = starts[i + 1]
+        return self
+
+    def shift(self, milliseconds: int) -> "CueTimeline":
+        """
+        Moves every cue by milliseconds, earlier when negative. Times moved before 0 are clamped to 0,
+        so cues moved entirely before 0 are dropped on serialization.
+        """
+        delta = milliseconds * 1000
+
+        if self.backend == "numpy":
+            self.starts = numpy.maximum(self.starts + delta, 0)
+            self.ends = numpy.maximum(self.ends + delta, 0)
+        else:
+            self.starts = array("q", [max(value + delta, 0) for value in self.starts])
+            self.ends = array("q", [max(value + delta, 0) for value in self.ends])
+        return self
+
+    def rescale(self, source: Framerate, target: Framerate) -> "CueTimeline":
+        """
+        Retimes cues authored against the source framerate for a video at the target framerate
+        (e.g. 23.976 -> 25), rounding to the nearest microsecond.
+        """
+        ratio = _ratio(source, target)
+        numerator, denominator = ratio.numerator, ratio.denominator
+
+        for name in ("starts", "ends"):
+            column = getattr(self, name)
+            if self.backend == "numpy" and len(column):
+                # Exact in int64 unless the products overflow, then rounded by Python below.
+                bound = max(abs(int(column.max())), abs(int(column.min())))
+                if bound * numerator < 2 ** 63:
+                    quotient, remainder = numpy.divmod(column * numerator, denominator)
+                    twice = remainder * 2
+                    quotient += (twice > denominator) | ((twice == denominator) & (quotient % 2 == 1))
+                    setattr(self, name, quotient)
+                    continue
+            values = [_round_div(value, numerator, denominator) for value in column.tolist()]
+            setattr(self, name, self._column(values))
+        return self
+
+    def to_srt(self) -> str:
+        """
+        Renders the cues as SRT, see the class documentation for the rules.
+        """
+        self.sort()
+
+        rendered = []
+        for content, proprietary in self.table:
+            rendered.append((
+                f" {proprietary}" if proprietary else "",
+                _legal_content(content),
+                not content.strip()
+            ))
+
+        if self.backend == "numpy":
+            empty = numpy.array([text[2] for text in rendered], dtype=bool)
+            keep = (self.starts >= 0) & (self.starts < self.ends)
+            if len(empty):
+                keep &= ~empty[self.texts]
+            texts = self.texts[keep].tolist()
+            columns = []
+            for times in (self.starts[keep] // 1000, self.ends[keep] // 1000):
+                hours, rest = numpy.divmod(times, 3_600_000)
+                minutes, rest = numpy.divmod(rest, 60_000)
+                seconds, milliseconds = numpy.divmod(rest, 1000)
+                columns += [hours.tolist(), minutes.tolist(), seconds.tolist(), milliseconds.tolist()]
+            blocks = []
+            for number, fields in enumerate(zip(*columns, texts), 1):
+                proprietary, content, _ = rendered[fields[8]]
+                blocks.append(_BLOCK % (number, *fields[:8], proprietary, content))
+            return "".join(blocks)
+
+        blocks = []
+        number = 0
+        for start, end, text in zip(self.starts, self.ends, self.texts):
+            proprietary, content, empty = rendered[text]
+            if empty or start < 0 or start >= end:
+                continue
+            number += 1
+            start, end = start // 1000, end // 1000
+            blocks.append(_BLOCK % (
+                number,
+                start // 3_600_000, start // 60_000 % 60, start // 1000 % 60, start % 1000,
+                end // 3_600_000, end // 60_000 % 60, end // 1000 % 60, end % 1000,
+                proprietary,
+                content
+            ))
+        return "".join(blocks)
@@ -0,0 +1,293 @@
+import os
+import json
+import time
+import threading
+
+from collections import deque
+from pathlib import Path
+from typing import Iterable, List, Optional
+from urllib.parse import urlsplit
+
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+class RequestInfo:
+    """
+    Describes one HTTP request as seen by the hooks. Fields are filled in as the request progresses.
+    """
+    __slots__ = (
+        "method", "url", "endpoint", "start", "end", "status",
+        "bytes_sent", "bytes_received", "retries", "error", "thread"
+    )
+
+    def __init__(self, method: str, url: str, bytes_sent: int = 0):
+        self.method = method
+        self.url = url
+        self.endpoint = endpoint_name(method, url)
+        self.start = time.perf_counter()
+        self.end = None
+        self.status = None
+        self.bytes_sent = bytes_sent
+        self.bytes_received = 0
+        self.retries = 0
+        self.error = None
+        self.thread = threading.get_ident()
+
+    @property
+    def elapsed(self) -> float:
+        return (self.end or time.perf_counter()) - self.start
+
+class ConversionInfo:
+    """
+    Describes one subtitle conversion as seen by the hooks.
+    """
+    __slots__ = ("format", "start", "end", "bytes_in", "bytes_out", "ok", "error", "thread")
+
+    def __init__(self, bytes_in: int):
+        self.format = None
+        self.start = time.perf_counter()
+        self.end = None
+        self.bytes_in = bytes_in
+        self.bytes_out = 0
+        self.ok = False
+        self.error = None
+        self.thread = threading.get_ident()
+
+    @property
+    def elapsed(self) -> float:
+        return (self.end or time.perf_counter()) - self.start
+
+class Hook:
+    """
+    Base class of the instrumentation hooks called by Looke.send_request and subtitle.convert_bytes.
+    Every method is a no-op, subclasses override the events they care about.
+    """
+    def before_request(self, info: RequestInfo) -> None:
+        pass
+
+    def after_request(self, info: RequestInfo) -> None:
+        pass
+
+    def cache_lookup(self, endpoint: str, hit: bool) -> None:
+        pass
+
+    def before_conversion(self, info: ConversionInfo) -> None:
+        pass
+
+    def after_conversion(self, info: ConversionInfo) -> None:
+        pass
+
+def endpoint_name(method: str, url: str) -> str:
+    """
+    Groups URLs into endpoints: API calls by their path, subtitle files by host and extension.
+    """
+    parts = urlsplit(url)
+    if "/v1/" in parts.path:
+        return f"{method} {parts.path.rsplit('/', 1)[-1]}"
+    extension = parts.path.rsplit(".", 1)[-1] if "." in parts.path.rsplit("/", 1)[-1] else ""
+    return f"{method} {parts.hostname}/*.{extension}" if extension else f"{method} {parts.hostname}{parts.path}"
+
+def call(hooks: Iterable[Hook], event: str, *args) -> None:
+    for hook in hooks:
+        getattr(hook, event)(*args)
+
+class Histogram:
+    """
+    Latency histogram with fixed millisecond buckets, plus the raw samples for percentiles.
+    """
+    def __init__(self, max_samples: Optional[int] = None):
+        """
+        :param max_samples: Only keep this many recent samples, so percentiles describe a sliding window
+            and memory stays bounded in long-running processes. Counts and buckets cover every sample.
+        """
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.samples = deque(maxlen=max_samples) if max_samples else []
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        ms = seconds * 1000
+        for index, bound in enumerate(LATENCY_BUCKETS_MS):
+            if ms <= bound:
+                self.buckets[index] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, fraction: float) -> float:
+        if not self.samples:
+            return 0.0
+        samples = sorted(self.samples)
+        return samples[min(int(len(samples) * fraction), len(samples) - 1)]
+
+    def as_dict(self) -> dict:
+        labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            "count": self.count,
+            "total_s": self.total,
+            "p50_ms": self.percentile(0.50) * 1000,
+            "p95_ms": self.percentile(0.95) * 1000,
+            "p99_ms": self.percentile(0.99) * 1000,
+            "max_ms": self.max * 1000,
+            "buckets": {label: count for label, count in zip(labels, self.buckets) if count}
+        }
+
+class Profiler(Hook):
+    """
+    Hook recording per-endpoint latency histograms, bytes transferred, retries, errors, cache hits
+    and conversion timings, with summary table and Chrome trace exporters.
+    """
+    def __init__(self, keep_events: bool = True, max_samples: Optional[int] = None):
+        """
+        :param keep_events: Keep every request and conversion for the Chrome trace export.
+        :param max_samples: Latency samples kept per endpoint for percentiles, all if omitted (see Histogram).
+        """
+        self.keep_events = keep_events
+        self.max_samples = max_samples
+        self.started = time.perf_counter()
+        self.endpoints = {}
+        self.conversions = {}
+        self.cache = {}
+        self.events = []
+        self._lock = threading.Lock()
+
+    def _endpoint(self, name: str) -> dict:
+        return self.endpoints.setdefault(name, {
+            "latency": Histogram(self.max_samples),
+            "bytes_sent": 0,
+            "bytes_received": 0,
+            "retries": 0,
+            "errors": 0
+        })
+
+    def after_request(self, info: RequestInfo) -> None:
+        with self._lock:
+            stats = self._endpoint(info.endpoint)
+            stats["latency"].add(info.elapsed)
+            stats["bytes_sent"] += info.bytes_sent
+            stats["bytes_received"] += info.bytes_received
+            stats["retries"] += info.retries
+            stats["errors"] += bool(info.error) or (info.status or 0) >= 400
+            if self.keep_events:
+                self.events.append(("request", info))
+
+    def cache_lookup(self, endpoint: str, hit: bool) -> None:
+        with self._lock:
+            stats = self.cache.setdefault(endpoint, {"hits": 0, "misses": 0})
+            stats["hits" if hit else "misses"] += 1
+
+    def after_conversion(self, info: ConversionInfo) -> None:
+        name = info.format or "unknown"
+        with self._lock:
+            stats = self.conversions.setdefault(name, {
+                "latency": Histogram(self.max_samples),
+                "bytes_in": 0,
+                "bytes_out": 0,
+                "errors": 0
+            })
+            stats["latency"].add(info.elapsed)
+            stats["bytes_in"] += info.bytes_in
+            stats["bytes_out"] += info.bytes_out
+            stats["errors"] += not info.ok
+            if self.keep_events:
+                self.events.append(("conversion", info))
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            def flatten(groups: dict) -> dict:
+                return {
+                    name: {**{k: v for k, v in stats.items() if k != "latency"}, "latency": stats["latency"].as_dict()}
+                    for name, stats in groups.items()
+                }
+
+            return {
+                "wall_s": time.perf_counter() - self.started,
+                "endpoints": flatten(self.endpoints),
+                "conversions": flatten(self.conversions),
+                "cache": {name: dict(stats) for name, stats in self.cache.items()}
+            }
+
+    def summary(self) -> str:
+        """
+        Renders the recorded metrics as a plain text table.
+        """
+        data = self.as_dict()
+        rows: List[tuple] = []
+
+        for name, stats in sorted(data["endpoints"].items()):
+            latency = stats["latency"]
+            rows.append((
+                name, latency["count"], latency["total_s"], latency["p50_ms"], latency["p95_ms"], latency["max_ms"],
+                f"{stats['bytes_received'] / 1024:.1f} KiB", stats["retries"], stats["errors"]
+            ))
+        for name, stats in sorted(data["conversions"].items()):
+            latency = stats["latency"]
+            rows.append((
+                f"convert {name}", latency["count"], latency["total_s"], latency["p50_ms"], latency["p95_ms"],
+                latency["max_ms"], f"{stats['bytes_in'] / 1024:.1f} KiB", "-", stats["errors"]
+            ))
+
+        header = ("operation", "count", "total s", "p50 ms", "p95 ms", "max ms", "bytes", "retries", "errors")
+        width = max([len(header[0])] + [len(row[0]) for row in rows])
+        lines = [
+            f"{header[0]:<{width}} {header[1]:>6} {header[2]:>9} {header[3]:>9} {header[4]:>9} {header[5]:>9} "
+            f"{header[6]:>12} {header[7]:>7} {header[8]:>6}"
+        ]
+        for row in rows:
+            lines.append(
+                f"{row[0]:<{width}} {row[1]:>6} {row[2]:>9.3f} {row[3]:>9.1f} {row[4]:>9.1f} {row[5]:>9.1f} "
+                f"{row[6]:>12} {row[7]:>7} {row[8]:>6}"
+            )
+
+        for name, stats in sorted(data["cache"].items()):
+            total = stats["hits"] + stats["misses"]
+            lines.append(f"cache {name}: {stats['hits']} hits / {total} lookups")
+
+        lines.append(f"wall time: {data['wall_s']:.3f}s")
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> dict:
+        """
+        Exports the recorded events in the Chrome trace event format (chrome://tracing, Perfetto).
+        """
+        pid = os.getpid()
+        events = []
+
+        with self._lock:
+            for kind, info in self.events:
+                if kind == "request":
+                    name = info.endpoint
+                    args = {
+                        "url": info.url,
+                        "status": info.status,
+                        "bytes_sent": info.bytes_sent,
+                        "bytes_received": info.bytes_received,
+                        "retries": info.retries,
+                        "error": info.error
+                    }
+                else:
+                    name = f"convert {info.format or 'unknown'}"
+                    args = {"bytes_in": info.bytes_in, "bytes_out": info.bytes_out, "ok": info.ok, "error": info.error}
+
+                events.append({
+                    "name": name,
+                    "cat": kind,
+                    "ph": "X",
+                    "ts": round((info.start - self.started) * 1_000_000, 3),
+                    "dur": round(info.elapsed * 1_000_000, 3),
+                    "pid": pid,
+                    "tid": info.thread,
+                    "args": args
+                })
+
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save_chrome_trace(self, path: Path) -> None:
+        Path(path).write_text(json.dumps(self.chrome_trace()))
+
+def error_name(error: Optional[BaseException]) -> Optional[str]:
+    return f"{type(error).__name__}: {error}" if error else None
@@ -0,0 +1,233 @@
+import time
+import threading
+
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from requests import Session, Response
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, Timeout
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from pylooke.utils.policy import IDEMPOTENT_METHODS, THROTTLE_STATUSES, RetryPolicy, TokenBucket
+
+DEFAULT_HEADERS = {
+    "Accept": "*/*",
+    "User-Agent": "okhttp/4.10.0"
+}
+
+class TransportStats:
+    """
+    Thread-safe counters describing how a Transport uses its connections.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.handshakes = 0
+        self.retries = 0
+        self.throttled = 0.0
+        self.per_host = {}
+
+    def record_request(self, host: str) -> None:
+        with self._lock:
+            self.requests += 1
+            self.per_host.setdefault(host, {"requests": 0, "handshakes": 0})["requests"] += 1
+
+    def record_handshake(self, host: str) -> None:
+        with self._lock:
+            self.handshakes += 1
+            self.per_host.setdefault(host, {"requests": 0, "handshakes": 0})["handshakes"] += 1
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def record_throttle(self, seconds: float) -> None:
+        with self._lock:
+            self.throttled += seconds
+
+    @property
+    def reused(self) -> int:
+        """
+        Number of requests that were sent over an already open connection.
+        """
+        return max(self.requests - self.handshakes, 0)
+
+    @property
+    def reuse_ratio(self) -> float:
+        """
+        Fraction of requests that did not need a new TCP/TLS handshake.
+        """
+        if not self.requests:
+            return 0.0
+        return self.reused / self.requests
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "handshakes": self.handshakes,
+                "reused": self.reused,
+                "reuse_ratio": self.reuse_ratio,
+                "retries": self.retries,
+                "throttled_s": self.throttled,
+                "per_host": {host: dict(counts) for host, counts in self.per_host.items()}
+            }
+
+class _CountingAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose connection pools report every new connection to a TransportStats.
+    """
+    def __init__(self, stats: TransportStats, **kwargs):
+        self.stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+
+        stats = self.stats
+
+        def counting(pool_class):
+            class CountingPool(pool_class):
+                def _new_conn(self):
+                    stats.record_handshake(self.host)
+                    return super()._new_conn()
+            return CountingPool
+
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": counting(HTTPConnectionPool),
+            "https": counting(HTTPSConnectionPool)
+        }
+
+class Transport:
+    """
+    Pooled, keep-alive HTTP transport shared by every request of a Looke client.
+    """
+    def __init__(
+        self,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        pool_block: bool = False,
+        headers: Optional[dict] = None,
+        session: Optional[Session] = None,
+        max_in_flight: Optional[int] = None,
+        policy: Optional[RetryPolicy] = None,
+        rate_limit: Optional[float] = None,
+        rate_limits: Optional[Dict[str, float]] = None
+    ):
+        """
+        Initializes the transport with a requests Session mounted on a counting connection pool.
+
+        :param pool_connections: Number of per-host connection pools to cache.
+        :param pool_maxsize: Maximum number of keep-alive connections kept per host.
+        :param pool_block: Block when a host pool is exhausted instead of opening throwaway connections.
+        :param headers: Default headers sent with every request, merged over DEFAULT_HEADERS.
+        :param session: Optional pre-built Session, e.g. one pointed at a local stand-in server.
+        :param max_in_flight: Global limit of requests in flight across all hosts and threads.
+        :param policy: Timeouts, retries and backoff, a default RetryPolicy is used if omitted.
+        :param rate_limit: Requests per second allowed to each host, unlimited if omitted.
+        :param rate_limits: Per-host overrides of rate_limit, keyed by hostname.
+        """
+        self.stats = TransportStats()
+        self.session = session or Session()
+        self.session.headers.update({**DEFAULT_HEADERS, **(headers or {})})
+
+        adapter = _CountingAdapter(
+            stats=self.stats,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.in_flight = threading.BoundedSemaphore(max_in_flight) if max_in_flight else None
+
+        self.policy = policy or RetryPolicy()
+        self.rate_limit = rate_limit
+        self.rate_limits = dict(rate_limits or {})
+        self.buckets = {}
+        self._buckets_lock = threading.Lock()
+
+    def request(self, **kwargs) -> Response:
+        """
+        Sends an HTTP request through the pooled session, applying the timeout, retry and rate limit policies.
+
+        Only idempotent requests are retried: GET/HEAD/OPTIONS, or any request sent with idempotent=True.
+        The number of retries spent is stored on the response as response.retries.
+
+        :param kwargs: Keyword arguments containing method, URL, headers, params, json and data for the request.
+
+        :return: Response object from the HTTP request.
+        """
+        if self.in_flight:
+            with self.in_flight:
+                return self._request(**kwargs)
+
+        return self._request(**kwargs)
+
+    def bucket(self, host: str) -> Optional[TokenBucket]:
+        rate = self.rate_limits.get(host, self.rate_limit)
+        if not rate:
+            return None
+
+        with self._buckets_lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                bucket = self.buckets[host] = TokenBucket(rate)
+            return bucket
+
+    def _request(self, **kwargs) -> Response:
+        host = urlsplit(kwargs["url"]).hostname or ""
+        bucket = self.bucket(host)
+        retryable = kwargs.get("idempotent", kwargs["method"].upper() in IDEMPOTENT_METHODS)
+        attempt = 0
+
+        while True:
+            if bucket:
+                self.stats.record_throttle(bucket.acquire())
+
+            self.stats.record_request(host)
+
+            try:
+                response = self.session.request(
+                    method=kwargs["method"],
+                    url=kwargs["url"],
+                    headers=kwargs.get("headers", {}),
+                    params=kwargs.get("params", {}),
+                    json=kwargs.get("json", None),
+                    data=kwargs.get("data", None),
+                    timeout=kwargs.get("timeout", self.policy.timeout),
+                    stream=kwargs.get("stream", False)
+                )
+            except (ConnectionError, Timeout):
+                if not retryable or attempt >= self.policy.retries:
+                    raise
+                delay = self.policy.delay(attempt)
+            else:
+                if bucket:
+                    if response.status_code in THROTTLE_STATUSES:
+                        bucket.throttled()
+                    else:
+                        bucket.succeeded()
+
+                if not retryable or attempt >= self.policy.retries or \
+                        response.status_code not in self.policy.retry_statuses:
+                    response.retries = attempt
+                    return response
+
+                delay = self.policy.delay(attempt, response.headers.get("Retry-After"))
+                response.close()
+
+            attempt += 1
+            self.stats.record_retry()
+            time.sleep(delay)
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()